@@ -1,28 +1,72 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from dotenv import load_dotenv
 import os
 
 db = SQLAlchemy()
 
-def create_app():
+def create_app(test_config=None, start_background_jobs=True):
+    """
+    Build the app. A multi-process server passes start_background_jobs=False and
+    starts them in one process itself (see gunicorn.conf.py).
+    """
     app = Flask(__name__)
     
+    # Settings from backend/.env, without overriding variables already set
+    load_dotenv(os.path.join(os.path.dirname(app.root_path), '.env'))
+    
     # Configuration
-    app.config['SECRET_KEY'] = 'dev-secret-key'
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///bettracker.db'
+    from app.database import load_database_config, build_engine_options, register_sqlite_pragmas
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    load_database_config(app)
+    
+    # Arbitrage pruning (interval in seconds, 0 disables the background job; TTL in hours, 0 disables it)
+    app.config['ARBITRAGE_PRUNE_INTERVAL'] = int(os.environ.get('ARBITRAGE_PRUNE_INTERVAL', 600))
+    app.config['ARBITRAGE_TTL_HOURS'] = float(os.environ.get('ARBITRAGE_TTL_HOURS', 0)) or None
+    app.config['ARBITRAGE_PRUNE_BATCH_SIZE'] = int(os.environ.get('ARBITRAGE_PRUNE_BATCH_SIZE', 500))
+    
+    # Results-feed settlement (file path or http(s) URL, interval in seconds, 0 disables the background job)
+    app.config['RESULTS_FEED'] = os.environ.get('RESULTS_FEED') or None
+    app.config['RESULTS_SETTLE_INTERVAL'] = int(os.environ.get('RESULTS_SETTLE_INTERVAL', 300))
+    app.config['RESULTS_SETTLE_BATCH_SIZE'] = int(os.environ.get('RESULTS_SETTLE_BATCH_SIZE', 500))
+    
+    # Response cache of the polled read endpoints (TTL in seconds, 0 disables it)
+    app.config['RESPONSE_CACHE_TTL'] = float(os.environ.get('RESPONSE_CACHE_TTL', 30))
+    app.config['RESPONSE_CACHE_MAX_ENTRIES'] = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256))
+    
+    # Arbitrage event stream (heartbeat in seconds, queue size in events per client)
+    app.config['ARBITRAGE_STREAM_HEARTBEAT'] = float(os.environ.get('ARBITRAGE_STREAM_HEARTBEAT', 15))
+    app.config['ARBITRAGE_STREAM_QUEUE_SIZE'] = int(os.environ.get('ARBITRAGE_STREAM_QUEUE_SIZE', 1000))
+    
+    # Overrides used by the tests, e.g. an in-memory database
+    if test_config:
+        app.config.update(test_config)
     
     # Initialize extensions
+    build_engine_options(app)
     db.init_app(app)
+    with app.app_context():
+        register_sqlite_pragmas(db.engine, app.config)
     CORS(app)
     
+    from app.cache import init_response_cache
+    from app.events import init_event_broker
+    from app.resolvers import init_name_cache
+    init_response_cache(app)
+    init_event_broker(app)
+    init_name_cache(app)
+    
     # Import models
     from app.models.bet import Bet
     from app.models.transaction import Transaction
     from app.models.arbitrage import Arbitrage
+    from app.models.arbitrage_group import ArbitrageGroup
     from app.models.account import Account
     from app.models.sportsbook import Sportsbook
+    from app.models.stats_counter import StatsCounter
+    from app.models.table_version import TableVersion
     
     # Register blueprints
     from app.routes.bets import bets_bp
@@ -41,5 +85,15 @@ def create_app():
     # Create tables
     with app.app_context():
         db.create_all()
+        TableVersion.ensure_rows()
+    
+    # Bump the table versions behind the ETags on every commit
+    TableVersion.track_writes(db.session)
+    
+    # Start background jobs
+    if start_background_jobs:
+        from app.maintenance import start_arbitrage_pruner, start_results_settler
+        start_arbitrage_pruner(app)
+        start_results_settler(app)
     
     return app
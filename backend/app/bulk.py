@@ -0,0 +1,33 @@
+from flask import request
+import json
+
+def iter_bulk_payload():
+    """
+    Yield (payload, error) pairs from a JSON array body or, line by line,
+    from an NDJSON body. Raises ValueError if the body is neither.
+    """
+    if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        # Read the body in chunks rather than letting the stream split lines byte by byte
+        buffer = b''
+        while True:
+            chunk = request.stream.read(64 * 1024)
+            lines = (buffer + chunk).split(b'\n')
+            buffer = lines.pop() if chunk else b''
+            
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line), None
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    yield None, f'Invalid JSON: {e}'
+            
+            if not chunk:
+                return
+    
+    data = request.get_json(silent=True)
+    if not isinstance(data, list):
+        raise ValueError('Request body must be a JSON array or NDJSON')
+    for payload in data:
+        yield payload, None
@@ -0,0 +1,184 @@
+from flask import current_app, request, make_response, g
+from collections import OrderedDict
+from functools import wraps
+import threading
+import time
+
+class ResponseCache:
+    """
+    In-process TTL + LRU cache of successful GET responses. Every entry carries
+    tags (e.g. 'bets', 'arbitrages') and invalidate() drops all entries with a
+    given tag. Each worker process has its own cache, so the TTL bounds how stale
+    a response can be after a write handled by another worker.
+    """
+    
+    def __init__(self, max_entries=256, ttl=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._generations = {}  # tag -> number of invalidations
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'invalidations': 0}
+    
+    @property
+    def enabled(self):
+        return bool(self.ttl) and self.max_entries > 0
+    
+    def generation(self, tags):
+        """Snapshot of the invalidation counts of tags, taken before computing a response"""
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+    
+    def get(self, key):
+        """Get a cached value, or None on a miss or an expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            
+            if entry is None:
+                self.counters['misses'] += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.counters['hits'] += 1
+            return entry[2]
+    
+    def set(self, key, value, tags, ttl=None, generation=None):
+        """
+        Store a value. When generation is given and one of the tags was invalidated
+        since it was taken, the value may already be stale and is not stored.
+        """
+        with self._lock:
+            if generation is not None and generation != tuple(self._generations.get(tag, 0) for tag in tags):
+                return False
+            
+            self._entries[key] = (time.monotonic() + (ttl or self.ttl), frozenset(tags), value)
+            self._entries.move_to_end(key)
+            self.counters['stores'] += 1
+            
+            # Evict the least recently used entries
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters['evictions'] += 1
+            return True
+    
+    def invalidate(self, *tags):
+        """Drop every entry tagged with one of tags. Returns the number of dropped entries."""
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            
+            stale_keys = [key for key, (_, entry_tags, _) in self._entries.items() if entry_tags & tags]
+            for key in stale_keys:
+                del self._entries[key]
+            self.counters['invalidations'] += len(stale_keys)
+            return len(stale_keys)
+    
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            dropped = len(self._entries)
+            self._entries.clear()
+            return dropped
+    
+    def stats(self):
+        """Get a snapshot of the cache counters"""
+        with self._lock:
+            lookups = self.counters['hits'] + self.counters['misses']
+            return dict(
+                self.counters,
+                entries=len(self._entries),
+                max_entries=self.max_entries,
+                ttl_seconds=self.ttl,
+                hit_rate=round(self.counters['hits'] / lookups, 4) if lookups else None
+            )
+
+def init_response_cache(app):
+    """Attach a response cache configured from RESPONSE_CACHE_TTL and RESPONSE_CACHE_MAX_ENTRIES to app"""
+    app.extensions['response_cache'] = ResponseCache(
+        max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 256),
+        ttl=app.config.get('RESPONSE_CACHE_TTL', 30)
+    )
+    return app.extensions['response_cache']
+
+def get_response_cache(app=None):
+    """Get the response cache of app (default: the current app), or None if it has none"""
+    return (app or current_app).extensions.get('response_cache')
+
+def invalidate_responses(*tags, app=None):
+    """Drop the cached responses tagged with one of tags, e.g. after a write outside a request"""
+    cache = get_response_cache(app)
+    return cache.invalidate(*tags) if cache is not None else 0
+
+def cached_response(*tags, ttl=None):
+    """
+    Cache the successful responses of a GET route, keyed on the request path
+    plus the sorted query arguments. tags name the data the response depends on.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = get_response_cache()
+            if cache is None or not cache.enabled or request.method != 'GET':
+                return view(*args, **kwargs)
+            
+            # The same arguments in any order share an entry. Under conditional_response the
+            # ETag is part of the key, so writes made by other processes are never served.
+            key = (request.path, tuple(sorted(request.args.items(multi=True))), g.get('response_etag'))
+            cached = cache.get(key)
+            if cached is not None:
+                body, status, mimetype = cached
+                return current_app.response_class(body, status=status, mimetype=mimetype)
+            
+            generation = cache.generation(tags)
+            response = make_response(view(*args, **kwargs))
+            
+            # Errors are never cached
+            if response.status_code == 200 and not response.is_streamed:
+                cache.set(key, (response.get_data(), response.status_code, response.mimetype), tags, ttl, generation)
+            return response
+        return wrapper
+    return decorator
+
+def invalidate_on_write(blueprint, *tags):
+    """Drop the responses tagged with tags after every successful non-GET request to blueprint"""
+    @blueprint.after_request
+    def invalidate_cached_responses(response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            invalidate_responses(*tags)
+        return response
+    return blueprint
+
+def conditional_response(*models):
+    """
+    Give the responses of a GET route a strong ETag derived from the write
+    versions of the tables of models, and answer a matching If-None-Match
+    with 304 Not Modified without running the route.
+    """
+    from app.models.table_version import TableVersion
+    table_names = [model.__tablename__ for model in models]
+    
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            
+            etag = TableVersion.etag(table_names, request.path, sorted(request.args.items(multi=True)))
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                g.response_etag = etag
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            
+            # Clients may keep the body but must revalidate it on every use
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
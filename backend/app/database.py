@@ -0,0 +1,93 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+import os
+
+def _env(name, default, cast=int):
+    value = os.environ.get(name)
+    return cast(value) if value not in (None, '') else default
+
+def load_database_config(app):
+    """Read the database URL, pool sizing and SQLite pragmas from the environment into app.config"""
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL') or 'sqlite:///bettracker.db'
+    
+    # Pool sizing: pool_size connections stay open, max_overflow more are opened under load
+    app.config['DATABASE_POOL_SIZE'] = _env('DATABASE_POOL_SIZE', 10)
+    app.config['DATABASE_MAX_OVERFLOW'] = _env('DATABASE_MAX_OVERFLOW', 20)
+    app.config['DATABASE_POOL_TIMEOUT'] = _env('DATABASE_POOL_TIMEOUT', 30)
+    app.config['DATABASE_POOL_RECYCLE'] = _env('DATABASE_POOL_RECYCLE', 1800)
+    
+    # PostgreSQL statement timeout in milliseconds (0 disables it)
+    app.config['DATABASE_STATEMENT_TIMEOUT_MS'] = _env('DATABASE_STATEMENT_TIMEOUT_MS', 0)
+    
+    # SQLite connection pragmas (cache size in KiB, mmap size in bytes, busy timeout in milliseconds)
+    app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    app.config['SQLITE_CACHE_SIZE_KB'] = _env('SQLITE_CACHE_SIZE_KB', 64 * 1024)
+    app.config['SQLITE_MMAP_SIZE'] = _env('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)
+    app.config['SQLITE_BUSY_TIMEOUT_MS'] = _env('SQLITE_BUSY_TIMEOUT_MS', 5000)
+
+def normalize_database_url(url):
+    """Accept the postgres:// scheme that hosting providers hand out, which SQLAlchemy doesn't"""
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+def is_sqlite_memory(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+def build_engine_options(app):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database. Options already set
+    (e.g. by a test config) win. In-memory SQLite keeps Flask-SQLAlchemy's
+    single shared connection, so it gets no pool sizing. PostgreSQL connections
+    are named and get the optional statement timeout.
+    """
+    app.config['SQLALCHEMY_DATABASE_URI'] = normalize_database_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    
+    if not is_sqlite_memory(app.config['SQLALCHEMY_DATABASE_URI']):
+        options.setdefault('pool_size', app.config['DATABASE_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['DATABASE_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', app.config['DATABASE_POOL_TIMEOUT'])
+        options.setdefault('pool_recycle', app.config['DATABASE_POOL_RECYCLE'])
+        options.setdefault('pool_pre_ping', True)
+    
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'postgresql':
+        connect_args = dict(options.get('connect_args') or {})
+        connect_args.setdefault('application_name', 'bettracker')
+        if app.config['DATABASE_STATEMENT_TIMEOUT_MS']:
+            connect_args.setdefault('options', f"-c statement_timeout={int(app.config['DATABASE_STATEMENT_TIMEOUT_MS'])}")
+        options['connect_args'] = connect_args
+    
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    return options
+
+def sqlite_pragmas(config, memory=False):
+    """PRAGMA statements run on every new SQLite connection"""
+    pragmas = ['PRAGMA foreign_keys=ON']
+    if not memory:
+        # WAL lets readers and the single writer proceed concurrently; it doesn't apply to in-memory databases
+        pragmas.append(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+        pragmas.append(f"PRAGMA mmap_size={int(config['SQLITE_MMAP_SIZE'])}")
+    pragmas.append(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+    pragmas.append(f"PRAGMA cache_size={-int(config['SQLITE_CACHE_SIZE_KB'])}")  # Negative means KiB
+    pragmas.append(f"PRAGMA busy_timeout={int(config['SQLITE_BUSY_TIMEOUT_MS'])}")
+    return pragmas
+
+def register_sqlite_pragmas(engine, config):
+    """Apply the SQLite pragmas to every connection the engine opens"""
+    if engine.dialect.name != 'sqlite':
+        return
+    
+    pragmas = sqlite_pragmas(config, memory=is_sqlite_memory(str(engine.url)))
+    
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+
+def utc_now():
+    """Current time as a naive UTC datetime, the form kickoffs are stored in"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _parse_iso(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError(f'Invalid datetime format: {value}')
+    raise ValueError(f'Invalid datetime format: {value!r}')
+
+def parse_local_datetime(value):
+    """
+    Parse like parse_datetime, but into a naive local datetime: the clock bet
+    dates (date_placed, date_settled) are stored in. Naive inputs are taken to be local already.
+    """
+    parsed = _parse_iso(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def parse_datetime(value):
+    """
+    Parse an ISO 8601 string ('T' or space separator, optional fraction,
+    'Z' or offset suffix) or a datetime into a naive UTC datetime.
+    Naive inputs are taken to be UTC already. Raises ValueError if the value can't be parsed.
+    """
+    parsed = _parse_iso(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def to_utc_iso(value):
+    """Serialize a naive UTC datetime as ISO 8601 with a 'Z' suffix"""
+    return value.isoformat() + 'Z' if value else None
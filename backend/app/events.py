@@ -0,0 +1,182 @@
+from flask import current_app
+import itertools
+import json
+import queue
+import threading
+
+class Subscription:
+    """Queue of formatted server-sent events for one connected client"""
+    
+    def __init__(self, max_queue_size):
+        self.queue = queue.Queue(max_queue_size)
+        self.overflowed = False
+        self.closed = False
+    
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except queue.Full:
+            # A client that can't keep up is told to resync instead of blocking publishers
+            self.overflowed = True
+            return False
+    
+    def get(self, timeout):
+        """Next message, or None if nothing arrived within timeout seconds"""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+    
+    def drain(self):
+        """Drop every queued message and clear the overflow flag"""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.overflowed = False
+    
+    def close(self):
+        """Mark the subscription closed and wake up a reader waiting in get()"""
+        self.closed = True
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass  # The reader isn't waiting on a full queue
+
+class EventBroker:
+    """
+    In-process publish/subscribe of server-sent events. Publishers never block:
+    each subscriber has a bounded queue. Only writes handled by this process are
+    seen, so with several worker processes a client follows the writes of the
+    worker serving its stream.
+    """
+    
+    def __init__(self, max_queue_size=1000):
+        self.max_queue_size = max_queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._event_ids = itertools.count(1)
+        self.closed = False
+        self.counters = {'published': 0, 'delivered': 0, 'dropped': 0}
+    
+    def subscribe(self):
+        subscription = Subscription(self.max_queue_size)
+        with self._lock:
+            if self.closed:
+                subscription.close()
+            else:
+                self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+    
+    def has_subscribers(self):
+        with self._lock:
+            return bool(self._subscribers)
+    
+    def publish(self, event, data):
+        """Send an event to every subscriber. The payload is serialized once."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+            event_id = next(self._event_ids)
+        
+        message = format_event(event, data, event_id)
+        delivered = sum(1 for subscription in subscribers if subscription.put(message))
+        
+        with self._lock:
+            self.counters['published'] += 1
+            self.counters['delivered'] += delivered
+            self.counters['dropped'] += len(subscribers) - delivered
+    
+    def close(self):
+        """
+        Close every subscription, and those made later, so open streams end and
+        a shutting down server doesn't wait on them. Clients reconnect elsewhere.
+        """
+        with self._lock:
+            self.closed = True
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.close()
+    
+    def stats(self):
+        """Get a snapshot of the broker counters"""
+        with self._lock:
+            return dict(self.counters, subscribers=len(self._subscribers))
+
+def format_event(event, data, event_id=None):
+    """Format a server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+def init_event_broker(app):
+    """Attach an event broker configured from ARBITRAGE_STREAM_QUEUE_SIZE to app"""
+    app.extensions['event_broker'] = EventBroker(app.config.get('ARBITRAGE_STREAM_QUEUE_SIZE', 1000))
+    return app.extensions['event_broker']
+
+def get_event_broker(app=None):
+    """Get the event broker of app (default: the current app), or None if it has none"""
+    return (app or current_app).extensions.get('event_broker')
+
+def has_arbitrage_subscribers():
+    """Whether any client follows the arbitrage stream, so writers can skip building events"""
+    broker = get_event_broker()
+    return broker is not None and broker.has_subscribers()
+
+def publish_arbitrage_changes(inserted_ids=(), updated_ids=(), deleted=(), match_signatures=(), chunk_size=500):
+    """
+    Publish committed arbitrage writes to the stream: 'inserted' and 'updated'
+    events with the arbitrages, a 'deleted' event with the (id, match_signature)
+    pairs of deleted ones, then a 'groups' event with the new state of every
+    touched group and the signatures of the groups that no longer exist.
+    """
+    broker = get_event_broker()
+    if broker is None or not broker.has_subscribers():
+        return
+    
+    try:
+        _publish_arbitrage_changes(broker, inserted_ids, updated_ids, deleted, match_signatures, chunk_size)
+    except Exception as e:
+        # The writes are already committed, so a failed event must not fail the request
+        print(f"⚠️ Arbitrage stream error: {e}")
+
+def _publish_arbitrage_changes(broker, inserted_ids, updated_ids, deleted, match_signatures, chunk_size):
+    from app.models.arbitrage import Arbitrage
+    from app.models.arbitrage_group import ArbitrageGroup
+    from sqlalchemy.orm import joinedload
+    
+    def load(model, column, values, *options):
+        values = list(values)
+        rows = []
+        for start in range(0, len(values), chunk_size):
+            rows.extend(model.query.options(*options).filter(column.in_(values[start:start + chunk_size])).all())
+        return rows
+    
+    match_signatures = set(match_signatures)
+    for event, ids in (('inserted', inserted_ids), ('updated', updated_ids)):
+        if ids:
+            arbitrages = load(Arbitrage, Arbitrage.id, ids)
+            match_signatures.update(arbitrage.match_signature for arbitrage in arbitrages)
+            broker.publish(event, {'arbitrages': [arbitrage.to_dict() for arbitrage in arbitrages]})
+    
+    if deleted:
+        broker.publish('deleted', {
+            'arbitrages': [{'id': arbitrage_id, 'match_signature': match_signature} for arbitrage_id, match_signature in deleted]
+        })
+        match_signatures.update(match_signature for _, match_signature in deleted)
+    
+    if match_signatures:
+        groups = load(ArbitrageGroup, ArbitrageGroup.match_signature, match_signatures, joinedload(ArbitrageGroup.best_arbitrage))
+        remaining = {group.match_signature for group in groups}
+        broker.publish('groups', {
+            'updated': [group.to_dict() for group in groups],
+            'removed': sorted(match_signatures - remaining)
+        })
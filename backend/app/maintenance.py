@@ -0,0 +1,162 @@
+from app import db
+from app.datetime_utils import utc_now
+from app.cache import invalidate_responses
+from app.events import publish_arbitrage_changes
+from datetime import datetime, timedelta
+import threading
+import time
+
+# Counters for the arbitrage pruning job, exposed through the admin API
+prune_counters = {
+    'runs': 0,
+    'pruned_total': 0,
+    'pruned_kickoff_passed': 0,
+    'pruned_ttl_expired': 0,
+    'last_run_at': None,
+    'last_run_pruned': 0
+}
+_counters_lock = threading.Lock()
+
+# Counters for the results-feed settlement job, exposed through the admin API
+settlement_counters = {
+    'runs': 0,
+    'settled_total': 0,
+    'last_run_at': None,
+    'last_run_settled': 0,
+    'last_run_results': 0,
+    'last_run_unmatched': 0,
+    'last_run_invalid': 0
+}
+
+def _delete_in_batches(condition, batch_size):
+    """Delete arbitrages matching condition, committing after every batch so writers aren't locked out"""
+    from app.models.arbitrage import Arbitrage
+    from app.models.arbitrage_group import ArbitrageGroup
+    
+    deleted = 0
+    while True:
+        batch = db.session.query(Arbitrage.id, Arbitrage.match_signature).filter(condition).limit(batch_size).all()
+        if not batch:
+            break
+        
+        Arbitrage.query.filter(Arbitrage.id.in_([row.id for row in batch])).delete(synchronize_session=False)
+        ArbitrageGroup.refresh_many(row.match_signature for row in batch)
+        db.session.commit()
+        publish_arbitrage_changes(deleted=[(row.id, row.match_signature) for row in batch])
+        deleted += len(batch)
+    
+    return deleted
+
+def prune_stale_arbitrages(ttl_hours=None, batch_size=500, now=None):
+    """
+    Delete arbitrages whose kickoff has passed and, when ttl_hours is set,
+    those that haven't been refreshed within ttl_hours.
+    Returns the number of deleted arbitrages.
+    """
+    from app.models.arbitrage import Arbitrage
+    
+    now = now or datetime.now()
+    
+    # Kickoffs are stored in UTC, refresh times in local time
+    kickoff_passed = Arbitrage.kickoff_datetime < utc_now()
+    pruned_kickoff_passed = _delete_in_batches(kickoff_passed, batch_size)
+    
+    pruned_ttl_expired = 0
+    if ttl_hours:
+        ttl_expired = Arbitrage.updated_at < now - timedelta(hours=ttl_hours)
+        pruned_ttl_expired = _delete_in_batches(ttl_expired, batch_size)
+    
+    pruned = pruned_kickoff_passed + pruned_ttl_expired
+    if pruned:
+        invalidate_responses('arbitrages')
+    
+    with _counters_lock:
+        prune_counters['runs'] += 1
+        prune_counters['pruned_total'] += pruned
+        prune_counters['pruned_kickoff_passed'] += pruned_kickoff_passed
+        prune_counters['pruned_ttl_expired'] += pruned_ttl_expired
+        prune_counters['last_run_at'] = now.isoformat()
+        prune_counters['last_run_pruned'] = pruned
+    
+    return pruned
+
+def get_prune_counters():
+    """Get a snapshot of the pruning counters"""
+    with _counters_lock:
+        return dict(prune_counters)
+
+def settle_from_results(results, batch_size=500, now=None):
+    """
+    Settle the pending bets decided by results (see app.results_feed) and update
+    the job counters. Returns the settle_results summary.
+    """
+    from app.results_feed import settle_results
+    
+    now = now or datetime.now()
+    summary = settle_results(results, batch_size=batch_size)
+    if summary['settled']:
+        invalidate_responses('bets')
+    
+    with _counters_lock:
+        settlement_counters['runs'] += 1
+        settlement_counters['settled_total'] += summary['settled']
+        settlement_counters['last_run_at'] = now.isoformat()
+        settlement_counters['last_run_settled'] = summary['settled']
+        settlement_counters['last_run_results'] = summary['results']
+        settlement_counters['last_run_unmatched'] = summary['unmatched_results']
+        settlement_counters['last_run_invalid'] = summary['invalid_results']
+    
+    return summary
+
+def get_settlement_counters():
+    """Get a snapshot of the results-feed settlement counters"""
+    with _counters_lock:
+        return dict(settlement_counters)
+
+def start_arbitrage_pruner(app):
+    """Start the background thread that prunes stale arbitrages every ARBITRAGE_PRUNE_INTERVAL seconds"""
+    interval = app.config.get('ARBITRAGE_PRUNE_INTERVAL')
+    if not interval:
+        return None
+    
+    def run():
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    prune_stale_arbitrages(
+                        ttl_hours=app.config.get('ARBITRAGE_TTL_HOURS'),
+                        batch_size=app.config.get('ARBITRAGE_PRUNE_BATCH_SIZE', 500)
+                    )
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"⚠️ Arbitrage pruning error: {e}")
+    
+    thread = threading.Thread(target=run, name='arbitrage-pruner', daemon=True)
+    thread.start()
+    return thread
+
+def start_results_settler(app):
+    """Start the background thread that settles bets from RESULTS_FEED every RESULTS_SETTLE_INTERVAL seconds"""
+    source = app.config.get('RESULTS_FEED')
+    interval = app.config.get('RESULTS_SETTLE_INTERVAL')
+    if not source or not interval:
+        return None
+    
+    def run():
+        from app.results_feed import load_results
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    settle_from_results(
+                        load_results(source),
+                        batch_size=app.config.get('RESULTS_SETTLE_BATCH_SIZE', 500)
+                    )
+                except Exception as e:
+                    db.session.rollback()
+                    print(f"⚠️ Results settlement error: {e}")
+    
+    thread = threading.Thread(target=run, name='results-settler', daemon=True)
+    thread.start()
+    return thread
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class Account(db.Model):
     __tablename__ = 'accounts'
+    __table_args__ = (
+        db.Index('ix_accounts_created_at_id', 'created_at', 'id'),  # Keyset pagination
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     account_identifier = db.Column(db.String(100), unique=True, nullable=False)  # Email or phone number
@@ -1,15 +1,29 @@
 from datetime import datetime
 from app import db
+from app.datetime_utils import to_utc_iso
+import hashlib
 import json
 
 class Arbitrage(db.Model):
     __tablename__ = 'arbitrage'
+    __table_args__ = (
+        db.UniqueConstraint('match_signature', 'combination_hash', name='uq_arbitrage_signature_combination'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     match_signature = db.Column(db.String(255), nullable=False, index=True)
     profit = db.Column(db.Float, nullable=False, index=True)
-    kickoff_datetime = db.Column(db.String(50), nullable=False, index=True)
+    kickoff_datetime = db.Column(db.DateTime, nullable=False, index=True)  # Naive UTC, see app.datetime_utils
     combination_details = db.Column(db.Text, nullable=False)
+    combination_hash = db.Column(db.String(64), nullable=False, index=True)  # Identifies the same opportunity across scans
+    
+    # Match fields extracted from the first combination detail on write
+    market = db.Column(db.String(100), nullable=True, index=True)
+    league = db.Column(db.String(100), nullable=True, index=True)
+    country = db.Column(db.String(100), nullable=True, index=True)
+    home_team = db.Column(db.String(100), nullable=True)
+    away_team = db.Column(db.String(100), nullable=True)
+    
     created_at = db.Column(db.DateTime, default=datetime.now)
     updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
     
@@ -23,11 +37,110 @@ class Arbitrage(db.Model):
             'id': self.id,
             'match_signature': self.match_signature,
             'profit': self.profit,
-            'kickoff_datetime': self.kickoff_datetime,
+            'kickoff_datetime': to_utc_iso(self.kickoff_datetime),
             'combination_details': combination_data,
+            'market': self.market,
+            'league': self.league,
+            'country': self.country,
+            'home_team': self.home_team,
+            'away_team': self.away_team,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
     
+    @staticmethod
+    def apply_filters(query, min_profit=None, max_profit=None, kickoff_from=None, kickoff_to=None):
+        """Restrict an arbitrage query to a profit range and kickoff window"""
+        if min_profit is not None:
+            query = query.filter(Arbitrage.profit >= min_profit)
+        
+        if max_profit is not None:
+            query = query.filter(Arbitrage.profit <= max_profit)
+        
+        if kickoff_from is not None:
+            query = query.filter(Arbitrage.kickoff_datetime >= kickoff_from)
+        
+        if kickoff_to is not None:
+            query = query.filter(Arbitrage.kickoff_datetime <= kickoff_to)
+        
+        return query
+    
+    @staticmethod
+    def match_fields(combination_data):
+        """Get market, league, country and teams from parsed combination details"""
+        try:
+            first_detail = combination_data[0] if combination_data else None
+            if first_detail is not None and not isinstance(first_detail, dict):
+                first_detail = {}
+        except (KeyError, TypeError):
+            first_detail = {}
+        
+        # No combinations at all leaves the fields empty
+        return {
+            field: first_detail.get(field, 'Unknown') if first_detail is not None else None
+            for field in ['market', 'league', 'country', 'home_team', 'away_team']
+        }
+    
+    @staticmethod
+    def compute_combination_hash(combination_data):
+        """Stable hash of the bookmakers, selections and markets of parsed combination details"""
+        try:
+            legs = sorted(
+                [
+                    str(detail.get('bookmaker', '')).strip().lower(),
+                    str(detail.get('name', '')).strip().lower(),
+                    str(detail.get('market', '')).strip().lower()
+                ]
+                for detail in combination_data if isinstance(detail, dict)
+            )
+        except TypeError:
+            legs = []
+        
+        return hashlib.sha256(json.dumps(legs).encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def parse_combination_details(combination_details):
+        """Parse a combination_details JSON string for field extraction"""
+        try:
+            return json.loads(combination_details) if combination_details else []
+        except (json.JSONDecodeError, TypeError):
+            return [{}]  # Unreadable details count as unknown
+    
+    def extract_match_fields(self):
+        """Copy market, league, country and teams out of combination_details and hash the combination"""
+        combination_data = self.parse_combination_details(self.combination_details)
+        
+        for field, value in self.match_fields(combination_data).items():
+            setattr(self, field, value)
+        self.combination_hash = self.compute_combination_hash(combination_data)
+    
+    @classmethod
+    def upsert_statement(cls, now):
+        """
+        INSERT ... ON CONFLICT (match_signature, combination_hash) DO UPDATE statement.
+        A rescanned opportunity refreshes its profit, odds, match fields and
+        updated_at in place.
+        """
+        if db.engine.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        
+        statement = insert(cls.__table__).values(created_at=now, updated_at=now)
+        return statement.on_conflict_do_update(
+            index_elements=['match_signature', 'combination_hash'],
+            set_={
+                'profit': statement.excluded.profit,
+                'kickoff_datetime': statement.excluded.kickoff_datetime,
+                'combination_details': statement.excluded.combination_details,
+                'market': statement.excluded.market,
+                'league': statement.excluded.league,
+                'country': statement.excluded.country,
+                'home_team': statement.excluded.home_team,
+                'away_team': statement.excluded.away_team,
+                'updated_at': statement.excluded.updated_at
+            }
+        )
+    
     def __repr__(self):
         return f'<Arbitrage {self.match_signature} - {self.profit}% profit>'
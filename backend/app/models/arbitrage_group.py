@@ -0,0 +1,185 @@
+from datetime import datetime
+from app import db
+from app.models.arbitrage import Arbitrage
+from sqlalchemy import desc, asc, func
+import json
+
+class ArbitrageGroup(db.Model):
+    __tablename__ = 'arbitrage_group'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    match_signature = db.Column(db.String(255), nullable=False, unique=True, index=True)
+    best_arbitrage_id = db.Column(db.Integer, db.ForeignKey('arbitrage.id', ondelete='SET NULL'), nullable=True)
+    total_arbitrages = db.Column(db.Integer, nullable=False, default=0)
+    max_profit = db.Column(db.Float, nullable=False, index=True)
+    min_profit = db.Column(db.Float, nullable=False)
+    markets = db.Column(db.Text, nullable=True)  # JSON list of markets of the best arbitrage
+    kickoff_datetime = db.Column(db.DateTime, nullable=True, index=True)  # Copied from the best arbitrage for sorting
+    best_created_at = db.Column(db.DateTime, nullable=True, index=True)  # Copied from the best arbitrage for sorting
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    # Relationships
+    best_arbitrage = db.relationship('Arbitrage', lazy=True, foreign_keys=[best_arbitrage_id])
+    
+    def to_dict(self):
+        try:
+            markets = json.loads(self.markets) if self.markets else []
+        except json.JSONDecodeError:
+            markets = ['Unknown']
+        
+        return {
+            'match_signature': self.match_signature,
+            'best_arbitrage': self.best_arbitrage.to_dict() if self.best_arbitrage else None,
+            'total_arbitrages': self.total_arbitrages,
+            'max_profit': self.max_profit,
+            'min_profit': self.min_profit,
+            'markets_count': len(markets),
+            'markets': markets
+        }
+    
+    def __repr__(self):
+        return f'<ArbitrageGroup {self.match_signature} - {self.total_arbitrages} arbitrages>'
+    
+    @staticmethod
+    def extract_markets(combination_details):
+        """Get the distinct markets of a combination_details JSON string"""
+        try:
+            details = json.loads(combination_details)
+            return list(set(detail.get('market', 'Unknown') for detail in details))
+        except (json.JSONDecodeError, AttributeError, TypeError):
+            return ['Unknown']
+    
+    @classmethod
+    def ranked_query(cls, min_profit=None, max_profit=None, match_signatures=None, kickoff_from=None, kickoff_to=None):
+        """
+        Query the best arbitrage of every match signature together with the
+        group aggregates, computed with window functions in the database.
+        Yields (Arbitrage, total_arbitrages, max_profit, min_profit) rows.
+        """
+        ranked = db.session.query(
+            Arbitrage.id.label('arbitrage_id'),
+            func.row_number().over(
+                partition_by=Arbitrage.match_signature,
+                order_by=(desc(Arbitrage.profit), asc(Arbitrage.id))
+            ).label('group_rank'),
+            func.count(Arbitrage.id).over(partition_by=Arbitrage.match_signature).label('total_arbitrages'),
+            func.max(Arbitrage.profit).over(partition_by=Arbitrage.match_signature).label('max_profit'),
+            func.min(Arbitrage.profit).over(partition_by=Arbitrage.match_signature).label('min_profit')
+        )
+        
+        ranked = Arbitrage.apply_filters(ranked, min_profit, max_profit, kickoff_from, kickoff_to)
+        
+        if match_signatures is not None:
+            ranked = ranked.filter(Arbitrage.match_signature.in_(match_signatures))
+        
+        ranked = ranked.subquery()
+        
+        # Keep only the best arbitrage of each group
+        return db.session.query(
+            Arbitrage,
+            ranked.c.total_arbitrages,
+            ranked.c.max_profit,
+            ranked.c.min_profit
+        ).join(ranked, ranked.c.arbitrage_id == Arbitrage.id).filter(ranked.c.group_rank == 1)
+    
+    def set_best_arbitrage(self, arbitrage):
+        """Copy the sort keys of the best arbitrage onto the group"""
+        self.best_arbitrage_id = arbitrage.id
+        self.markets = json.dumps(self.extract_markets(arbitrage.combination_details))
+        self.kickoff_datetime = arbitrage.kickoff_datetime
+        self.best_created_at = arbitrage.created_at
+    
+    @classmethod
+    def record_arbitrage(cls, arbitrage):
+        """Fold a newly inserted arbitrage into its group without rescanning it"""
+        group = cls.query.filter_by(match_signature=arbitrage.match_signature).first()
+        
+        if group is None:
+            group = cls(
+                match_signature=arbitrage.match_signature,
+                total_arbitrages=1,
+                max_profit=arbitrage.profit,
+                min_profit=arbitrage.profit
+            )
+            group.set_best_arbitrage(arbitrage)
+            db.session.add(group)
+            return group
+        
+        group.total_arbitrages += 1
+        group.min_profit = min(group.min_profit, arbitrage.profit)
+        if arbitrage.profit > group.max_profit or group.best_arbitrage_id is None:
+            group.max_profit = max(group.max_profit, arbitrage.profit)
+            group.set_best_arbitrage(arbitrage)
+        
+        return group
+    
+    @classmethod
+    def refresh(cls, match_signature):
+        """Recompute a single group from its arbitrages (after an update or delete)"""
+        group = cls.query.filter_by(match_signature=match_signature).first()
+        
+        total_arbitrages, max_profit, min_profit = db.session.query(
+            func.count(Arbitrage.id),
+            func.max(Arbitrage.profit),
+            func.min(Arbitrage.profit)
+        ).filter(Arbitrage.match_signature == match_signature).one()
+        
+        if not total_arbitrages:
+            if group is not None:
+                db.session.delete(group)
+            return None
+        
+        best_arbitrage = Arbitrage.query.filter(
+            Arbitrage.match_signature == match_signature
+        ).order_by(desc(Arbitrage.profit), asc(Arbitrage.id)).first()
+        
+        if group is None:
+            group = cls(match_signature=match_signature)
+            db.session.add(group)
+        
+        group.total_arbitrages = total_arbitrages
+        group.max_profit = max_profit
+        group.min_profit = min_profit
+        group.set_best_arbitrage(best_arbitrage)
+        return group
+    
+    @classmethod
+    def insert_ranked(cls, ranked_rows):
+        """Bulk insert groups from ranked_query() rows. Returns the number of groups inserted."""
+        now = datetime.now()
+        rows = [
+            {
+                'match_signature': best_arbitrage.match_signature,
+                'best_arbitrage_id': best_arbitrage.id,
+                'total_arbitrages': total_arbitrages,
+                'max_profit': max_profit,
+                'min_profit': min_profit,
+                'markets': json.dumps(cls.extract_markets(best_arbitrage.combination_details)),
+                'kickoff_datetime': best_arbitrage.kickoff_datetime,
+                'best_created_at': best_arbitrage.created_at,
+                'updated_at': now
+            }
+            for best_arbitrage, total_arbitrages, max_profit, min_profit in ranked_rows
+        ]
+        
+        if rows:
+            db.session.execute(cls.__table__.insert(), rows)
+        return len(rows)
+    
+    @classmethod
+    def refresh_many(cls, match_signatures, chunk_size=500):
+        """Recompute the groups of many match signatures with set-based queries (after bulk writes)"""
+        match_signatures = list(set(match_signatures))
+        
+        for start in range(0, len(match_signatures), chunk_size):
+            chunk = match_signatures[start:start + chunk_size]
+            cls.query.filter(cls.match_signature.in_(chunk)).delete()
+            cls.insert_ranked(cls.ranked_query(match_signatures=chunk))
+    
+    @classmethod
+    def rebuild(cls):
+        """Rebuild the whole summary table from the arbitrage table. Returns the number of groups."""
+        cls.query.delete()
+        groups_created = cls.insert_ranked(cls.ranked_query())
+        db.session.commit()
+        return groups_created
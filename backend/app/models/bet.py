@@ -1,7 +1,16 @@
 from app import db
+from app.datetime_utils import to_utc_iso
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 
 class Bet(db.Model):
+    __table_args__ = (
+        db.Index('ix_bet_date_placed_id', 'date_placed', 'id'),  # Keyset pagination
+        db.Index('ix_bet_sport_sportsbook_id', 'sport', 'sportsbook_id'),  # Filter options and sport filters
+        db.Index('ix_bet_sportsbook_id', 'sportsbook_id'),  # Sportsbook joins and filters
+        db.Index('ix_bet_event_name_bet_type_status', 'event_name', 'bet_type', 'status'),  # Results-feed settlement
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     sport = db.Column(db.String(100), nullable=False)
     event_name = db.Column(db.String(200), nullable=False)
@@ -30,6 +39,11 @@ class Bet(db.Model):
     def __repr__(self):
         return f'<Bet {self.event_name} - {self.selection}>'
     
+    @classmethod
+    def relationship_load_options(cls):
+        """Loader options that fetch the relationships used by to_dict() in the same query"""
+        return (joinedload(cls.sportsbook_rel), joinedload(cls.account_rel))
+    
     def to_dict(self):
         # Get sportsbook name from relationship
         sportsbook_name = None
@@ -62,6 +76,6 @@ class Bet(db.Model):
             'profit_loss': self.profit_loss,
             'date_placed': self.date_placed.isoformat() if self.date_placed else None,
             'date_settled': self.date_settled.isoformat() if self.date_settled else None,
-            'kickoff': self.kickoff.isoformat() if self.kickoff else None,
+            'kickoff': to_utc_iso(self.kickoff),  # Stored as naive UTC
             'notes': self.notes
         }
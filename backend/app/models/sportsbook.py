@@ -6,6 +6,7 @@ class Sportsbook(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
+    name_key = db.Column(db.String(100), nullable=True, index=True)  # Case-folded name for lookups, kept in sync with name
     display_name = db.Column(db.String(100), nullable=True)  # Optional friendly display name
     website_url = db.Column(db.String(500), nullable=True)
     logo_url = db.Column(db.String(500), nullable=True)
@@ -18,6 +19,16 @@ class Sportsbook(db.Model):
     def __repr__(self):
         return f'<Sportsbook {self.name}>'
     
+    @db.validates('name')
+    def _set_name_key(self, key, name):
+        self.name_key = self.fold_name(name)
+        return name
+    
+    @staticmethod
+    def fold_name(name):
+        """Case-folded form of a sportsbook name, as stored in name_key"""
+        return name.casefold() if name is not None else None
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -40,7 +51,7 @@ class Sportsbook(db.Model):
     @classmethod
     def get_by_name(cls, name):
         """Get sportsbook by name (case insensitive)"""
-        return cls.query.filter(db.func.lower(cls.name) == name.lower()).first()
+        return cls.query.filter(cls.name_key == cls.fold_name(name)).order_by(cls.id).first()
     
     @classmethod
     def create_if_not_exists(cls, name, **kwargs):
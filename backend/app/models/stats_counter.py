@@ -0,0 +1,262 @@
+from datetime import datetime
+from app import db
+from app.models.bet import Bet
+from app.models.transaction import Transaction
+from app.models.account import Account
+from app.models.sportsbook import Sportsbook
+from sqlalchemy import and_, func, select, update
+
+COUNTER_FIELDS = ['count', 'amount', 'profit_loss', 'potential_payout', 'tax', 'charges']
+
+class StatsCounter(db.Model):
+    """
+    Running totals of bets and transactions per (account, sportsbook, sport or
+    transaction type, status), kept up to date by the write routes so the stats
+    endpoints don't have to scan the raw tables. Reads always SUM over matching
+    rows, so a key that ends up with more than one row is harmless.
+    """
+    __tablename__ = 'stats_counters'
+    __table_args__ = (
+        db.Index('ix_stats_counters_key', 'kind', 'account_id', 'sportsbook_id', 'category', 'status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'bet' or 'transaction'
+    account_id = db.Column(db.Integer, nullable=True)
+    sportsbook_id = db.Column(db.Integer, nullable=True)
+    category = db.Column(db.String(100), nullable=True)  # Sport for bets, transaction type for transactions
+    status = db.Column(db.String(20), nullable=True)
+    
+    count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0.0)  # Stake for bets, amount for transactions
+    profit_loss = db.Column(db.Float, nullable=False, default=0.0)
+    potential_payout = db.Column(db.Float, nullable=False, default=0.0)
+    tax = db.Column(db.Float, nullable=False, default=0.0)
+    charges = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+    
+    def __repr__(self):
+        return f'<StatsCounter {self.kind} {self.category}/{self.status}: {self.count}>'
+    
+    @staticmethod
+    def bet_entry(bet):
+        """Counter key and values contributed by a bet"""
+        key = ('bet', bet.account_id, bet.sportsbook_id, bet.sport, bet.status)
+        return key, {
+            'count': 1,
+            'amount': bet.stake or 0,
+            'profit_loss': bet.profit_loss or 0,
+            'potential_payout': bet.potential_payout or 0,
+            'tax': 0,
+            'charges': 0
+        }
+    
+    @staticmethod
+    def transaction_entry(transaction):
+        """Counter key and values contributed by a transaction"""
+        key = ('transaction', transaction.account_id, transaction.sportsbook_id, transaction.transaction_type, transaction.status)
+        return key, {
+            'count': 1,
+            'amount': transaction.amount or 0,
+            'profit_loss': 0,
+            'potential_payout': 0,
+            'tax': transaction.tax or 0,
+            'charges': transaction.transaction_charges or 0
+        }
+    
+    @classmethod
+    def key_filter(cls, key):
+        """SQL condition matching the counter rows of a key (NULL-safe)"""
+        kind, account_id, sportsbook_id, category, status = key
+        return and_(
+            cls.kind == kind,
+            cls.account_id.is_not_distinct_from(account_id),
+            cls.sportsbook_id.is_not_distinct_from(sportsbook_id),
+            cls.category.is_not_distinct_from(category),
+            cls.status.is_not_distinct_from(status)
+        )
+    
+    @classmethod
+    def apply(cls, added=(), removed=()):
+        """
+        Add the entries in added and subtract those in removed, merging them per key
+        first so a bulk write costs one UPDATE per distinct key. Runs in the caller's
+        transaction, so the counters commit or roll back with the rows themselves.
+        """
+        deltas = {}
+        for entries, sign in ((added, 1), (removed, -1)):
+            for key, values in entries:
+                delta = deltas.setdefault(key, dict.fromkeys(COUNTER_FIELDS, 0))
+                for field in COUNTER_FIELDS:
+                    delta[field] += sign * values[field]
+        
+        now = datetime.now()
+        for key, delta in deltas.items():
+            if not any(delta.values()):
+                continue
+            
+            # Update a single row of the key so duplicates aren't counted twice
+            target_id = select(func.min(cls.id)).where(cls.key_filter(key)).scalar_subquery()
+            result = db.session.execute(
+                update(cls).where(cls.id == target_id).values(
+                    dict({field: getattr(cls, field) + delta[field] for field in COUNTER_FIELDS}, updated_at=now)
+                ).execution_options(synchronize_session=False)
+            )
+            
+            if result.rowcount == 0:
+                kind, account_id, sportsbook_id, category, status = key
+                db.session.execute(cls.__table__.insert().values(
+                    kind=kind,
+                    account_id=account_id,
+                    sportsbook_id=sportsbook_id,
+                    category=category,
+                    status=status,
+                    updated_at=now,
+                    **delta
+                ))
+    
+    @classmethod
+    def record_bets(cls, bets, sign=1):
+        """Add (or with sign=-1 subtract) bets"""
+        entries = [cls.bet_entry(bet) for bet in bets]
+        if sign > 0:
+            cls.apply(added=entries)
+        else:
+            cls.apply(removed=entries)
+    
+    @classmethod
+    def record_transactions(cls, transactions, sign=1):
+        """Add (or with sign=-1 subtract) transactions"""
+        entries = [cls.transaction_entry(transaction) for transaction in transactions]
+        if sign > 0:
+            cls.apply(added=entries)
+        else:
+            cls.apply(removed=entries)
+    
+    @classmethod
+    def detach_account(cls, account_id):
+        """Move the counters of a deleted account to 'no account', as its bets and transactions are"""
+        cls.query.filter(cls.account_id == account_id).update({'account_id': None}, synchronize_session=False)
+    
+    @classmethod
+    def detach_sportsbook(cls, sportsbook_id):
+        """Move the counters of a deleted sportsbook to 'no sportsbook'"""
+        cls.query.filter(cls.sportsbook_id == sportsbook_id).update({'sportsbook_id': None}, synchronize_session=False)
+    
+    @classmethod
+    def bet_rows(cls, account=None, sportsbook=None):
+        """
+        (sport, status, count, stake, profit_loss, potential_payout) totals, the same
+        rows /stats aggregates from the bet table, optionally for one account
+        identifier and/or sportsbook name.
+        """
+        query = db.session.query(
+            cls.category,
+            cls.status,
+            func.sum(cls.count),
+            func.sum(cls.amount),
+            func.sum(cls.profit_loss),
+            func.sum(cls.potential_payout)
+        ).filter(cls.kind == 'bet')
+        
+        if account:
+            query = query.join(Account, cls.account_id == Account.id).filter(Account.account_identifier == account)
+        if sportsbook:
+            query = query.join(Sportsbook, cls.sportsbook_id == Sportsbook.id).filter(Sportsbook.name == sportsbook)
+        
+        return query.group_by(cls.category, cls.status).having(func.sum(cls.count) != 0).all()
+    
+    @classmethod
+    def transaction_rows(cls, sportsbook=None):
+        """
+        (sportsbook name, transaction type, count, amount, tax, charges) totals of
+        completed transactions, the same rows /transactions/stats aggregates.
+        """
+        query = db.session.query(
+            Sportsbook.name,
+            cls.category,
+            func.sum(cls.count),
+            func.sum(cls.amount),
+            func.sum(cls.tax),
+            func.sum(cls.charges)
+        ).outerjoin(Sportsbook, cls.sportsbook_id == Sportsbook.id).filter(
+            cls.kind == 'transaction',
+            cls.status == 'completed'
+        )
+        
+        if sportsbook:
+            query = query.filter(Sportsbook.name.ilike(f'%{sportsbook}%'))
+        
+        return query.group_by(cls.sportsbook_id, Sportsbook.name, cls.category).having(func.sum(cls.count) != 0).all()
+    
+    @staticmethod
+    def expected_rows():
+        """Counter rows recomputed from the bet and transaction tables"""
+        bet_rows = db.session.query(
+            Bet.account_id, Bet.sportsbook_id, Bet.sport, Bet.status,
+            func.count(Bet.id),
+            func.coalesce(func.sum(Bet.stake), 0.0),
+            func.coalesce(func.sum(Bet.profit_loss), 0.0),
+            func.coalesce(func.sum(Bet.potential_payout), 0.0)
+        ).group_by(Bet.account_id, Bet.sportsbook_id, Bet.sport, Bet.status).all()
+        
+        transaction_rows = db.session.query(
+            Transaction.account_id, Transaction.sportsbook_id, Transaction.transaction_type, Transaction.status,
+            func.count(Transaction.id),
+            func.coalesce(func.sum(Transaction.amount), 0.0),
+            func.coalesce(func.sum(Transaction.tax), 0.0),
+            func.coalesce(func.sum(Transaction.transaction_charges), 0.0)
+        ).group_by(Transaction.account_id, Transaction.sportsbook_id, Transaction.transaction_type, Transaction.status).all()
+        
+        rows = {}
+        for account_id, sportsbook_id, sport, status, count, stake, profit_loss, potential_payout in bet_rows:
+            rows[('bet', account_id, sportsbook_id, sport, status)] = {
+                'count': count, 'amount': stake, 'profit_loss': profit_loss,
+                'potential_payout': potential_payout, 'tax': 0.0, 'charges': 0.0
+            }
+        for account_id, sportsbook_id, transaction_type, status, count, amount, tax, charges in transaction_rows:
+            rows[('transaction', account_id, sportsbook_id, transaction_type, status)] = {
+                'count': count, 'amount': amount, 'profit_loss': 0.0,
+                'potential_payout': 0.0, 'tax': tax, 'charges': charges
+            }
+        return rows
+    
+    @classmethod
+    def verify(cls, tolerance=0.005):
+        """Compare the counters with the raw tables. Returns a list of (key, expected, actual) mismatches."""
+        actual = {}
+        totals = db.session.query(
+            cls.kind, cls.account_id, cls.sportsbook_id, cls.category, cls.status,
+            *[func.sum(getattr(cls, field)) for field in COUNTER_FIELDS]
+        ).group_by(cls.kind, cls.account_id, cls.sportsbook_id, cls.category, cls.status).all()
+        for row in totals:
+            values = dict(zip(COUNTER_FIELDS, row[5:]))
+            if any(values.values()):
+                actual[tuple(row[:5])] = values
+        
+        expected = cls.expected_rows()
+        empty = dict.fromkeys(COUNTER_FIELDS, 0)
+        mismatches = []
+        for key in set(expected) | set(actual):
+            expected_values = expected.get(key, empty)
+            actual_values = actual.get(key, empty)
+            if any(abs((expected_values[field] or 0) - (actual_values[field] or 0)) > tolerance for field in COUNTER_FIELDS):
+                mismatches.append((key, expected_values, actual_values))
+        return mismatches
+    
+    @classmethod
+    def rebuild(cls):
+        """Recompute every counter from the raw tables. Returns the number of counter rows."""
+        cls.query.delete()
+        
+        now = datetime.now()
+        rows = [
+            dict(values, kind=kind, account_id=account_id, sportsbook_id=sportsbook_id,
+                 category=category, status=status, updated_at=now)
+            for (kind, account_id, sportsbook_id, category, status), values in cls.expected_rows().items()
+        ]
+        if rows:
+            db.session.execute(cls.__table__.insert(), rows)
+        
+        db.session.commit()
+        return len(rows)
@@ -0,0 +1,94 @@
+from app import db
+from sqlalchemy import event, update
+import hashlib
+
+class TableVersion(db.Model):
+    """
+    Write counter per table, bumped once by every commit that wrote to the table
+    (ORM flushes and Core statements run through the session alike). The counters
+    live in the database, so every worker process sees the same versions; they
+    back the ETags of the polled read endpoints. The bump runs in its own short
+    transaction after the commit, so concurrent writers only queue on the counter
+    rows for that one UPDATE instead of for the whole of each other's transactions.
+    """
+    __tablename__ = 'table_versions'
+    
+    table_name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<TableVersion {self.table_name}: {self.version}>'
+    
+    @classmethod
+    def ensure_rows(cls):
+        """Add a counter row for every table of the models that doesn't have one yet"""
+        existing = {row.table_name for row in db.session.query(cls.table_name)}
+        missing = [name for name in db.metadata.tables if name not in existing and name != cls.__tablename__]
+        if missing:
+            db.session.execute(cls.__table__.insert(), [{'table_name': name, 'version': 0} for name in missing])
+        db.session.commit()
+    
+    @classmethod
+    def current(cls, table_names):
+        """Current versions of table_names in one primary key lookup, as a {table_name: version} dict"""
+        rows = db.session.query(cls.table_name, cls.version).filter(cls.table_name.in_(table_names)).all()
+        return dict(rows)
+    
+    @classmethod
+    def etag(cls, table_names, *parts):
+        """Strong ETag for a response built from table_names and identified by parts (e.g. path and arguments)"""
+        versions = cls.current(table_names)
+        token = '|'.join([f'{name}:{versions.get(name, 0)}' for name in sorted(table_names)] + [str(part) for part in parts])
+        return hashlib.sha1(token.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def track_writes(cls, session):
+        """Listen to session events so every commit bumps the versions of the tables it wrote to"""
+        if event.contains(session, 'after_flush', _record_flushed_tables):
+            return
+        event.listen(session, 'after_flush', _record_flushed_tables)
+        event.listen(session, 'do_orm_execute', _record_statement_table)
+        event.listen(session, 'before_commit', _collect_written_tables)
+        event.listen(session, 'after_commit', _bump_written_tables)
+        event.listen(session, 'after_rollback', _forget_written_tables)
+
+def _written_tables(session):
+    return session.info.setdefault('written_tables', set())
+
+def _record_flushed_tables(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, '__table__', None)
+        if table is not None:
+            _written_tables(session).add(table.name)
+
+def _record_statement_table(orm_execute_state):
+    # Bulk and Core INSERT/UPDATE/DELETE statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        table = getattr(orm_execute_state.statement, 'table', None)
+        name = getattr(table, 'name', None)
+        if name and name != TableVersion.__tablename__:
+            _written_tables(orm_execute_state.session).add(name)
+
+def _collect_written_tables(session):
+    # Flush first so the changes the commit is about to flush are counted too
+    session.flush()
+    written = session.info.pop('written_tables', None)
+    if written:
+        session.info['committing_tables'] = written
+
+def _bump_written_tables(session):
+    # The session can't emit SQL once committed, and the counters shouldn't be
+    # locked for its whole transaction anyway; sorted names keep the row locks in
+    # one order across writers
+    written = session.info.pop('committing_tables', None)
+    if written:
+        with session.get_bind().begin() as connection:
+            connection.execute(
+                update(TableVersion.__table__)
+                .where(TableVersion.__table__.c.table_name.in_(sorted(written)))
+                .values(version=TableVersion.__table__.c.version + 1)
+            )
+
+def _forget_written_tables(session):
+    session.info.pop('written_tables', None)
+    session.info.pop('committing_tables', None)
@@ -1,8 +1,12 @@
 from datetime import datetime
 from app import db
+from sqlalchemy.orm import joinedload
 
 class Transaction(db.Model):
     __tablename__ = 'transaction'
+    __table_args__ = (
+        db.Index('ix_transaction_date_created_id', 'date_created', 'id'),  # Keyset pagination
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     transaction_type = db.Column(db.String(20), nullable=False)  # 'deposit' or 'withdrawal'
@@ -17,7 +21,7 @@ class Transaction(db.Model):
     payment_method = db.Column(db.String(50), nullable=True)  # 'bank_transfer', 'credit_card', 'crypto', etc.
     reference_id = db.Column(db.String(100), nullable=True)  # transaction reference from sportsbook
     status = db.Column(db.String(20), default='completed')  # 'pending', 'completed', 'failed'
-    date_created = db.Column(db.DateTime, default=datetime.now)
+    date_created = db.Column(db.DateTime, nullable=False, default=datetime.now)
     date_processed = db.Column(db.DateTime, nullable=True)
     notes = db.Column(db.Text, nullable=True)
     
@@ -25,6 +29,11 @@ class Transaction(db.Model):
     sportsbook_rel = db.relationship('Sportsbook', backref='transactions', lazy=True, foreign_keys=[sportsbook_id])
     account_rel = db.relationship('Account', backref='transactions', lazy=True, foreign_keys=[account_id])
     
+    @classmethod
+    def relationship_load_options(cls):
+        """Loader options that fetch the relationships used by to_dict() in the same query"""
+        return (joinedload(cls.sportsbook_rel), joinedload(cls.account_rel))
+    
     def to_dict(self):
         # Get sportsbook name from relationship
         sportsbook_name = None
@@ -0,0 +1,60 @@
+from app import db
+from datetime import datetime
+from sqlalchemy import tuple_, desc, asc
+import base64
+import json
+
+def encode_cursor(values):
+    """Encode the sort key of the last row of a page as an opaque cursor string"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into sort key values for columns. Raises ValueError on a bad cursor."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    
+    if not isinstance(payload, list) or len(payload) != len(columns):
+        raise ValueError('Invalid cursor')
+    
+    values = []
+    for column, value in zip(columns, payload):
+        if isinstance(column.type, db.DateTime) and value is not None:
+            try:
+                value = datetime.fromisoformat(value)
+            except (ValueError, TypeError):
+                raise ValueError('Invalid cursor')
+        values.append(value)
+    return values
+
+def keyset_paginate(query, columns, cursor=None, per_page=50, descending=True):
+    """
+    Page through query ordered by columns (which must end with the primary key
+    and hold no NULLs) using the row-value comparison (columns) < (cursor)
+    instead of OFFSET, so every page is an index range scan.
+    Returns (items, next_cursor), next_cursor being None on the last page.
+    """
+    # An empty page would hand back a cursor that never advances
+    per_page = max(1, per_page)
+    
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        if descending:
+            query = query.filter(tuple_(*columns) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*columns) > tuple_(*values))
+    
+    direction = desc if descending else asc
+    query = query.order_by(*[direction(column) for column in columns])
+    
+    # Fetch one extra row to know whether there is a next page
+    items = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last_item = items[-1]
+        next_cursor = encode_cursor([getattr(last_item, column.key) for column in columns])
+    
+    return items, next_cursor
@@ -0,0 +1,236 @@
+from flask import current_app
+from app import db
+from app.models.account import Account
+from app.models.sportsbook import Sportsbook
+from app.models.table_version import TableVersion
+from sqlalchemy import event
+import threading
+
+class NameCache:
+    """
+    Sportsbook and account lookups by id and by name, shared by the requests of
+    one process. The cache is dropped whenever the sportsbook or accounts table
+    version changes, so renames and deletions through the CRUD routes (in any
+    worker) are picked up by the next transaction. Only committed rows are cached.
+    """
+    
+    TABLES = (Sportsbook.__tablename__, Account.__tablename__)
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = None
+        self._entries = {}
+        self.counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+    
+    def sync(self, versions):
+        """Drop every entry if the table versions differ from those the entries were read at"""
+        with self._lock:
+            if versions != self._versions:
+                if self._entries:
+                    self.counters['invalidations'] += 1
+                self._entries.clear()
+                self._versions = versions
+    
+    def get_many(self, keys):
+        """Cached values of keys as a dict; missing keys are left out"""
+        with self._lock:
+            found = {key: self._entries[key] for key in keys if key in self._entries}
+            self.counters['hits'] += len(found)
+            self.counters['misses'] += len(keys) - len(found)
+            return found
+    
+    def set_many(self, values, versions):
+        """Store values unless the tables changed since versions were read"""
+        with self._lock:
+            if versions == self._versions:
+                self._entries.update(values)
+    
+    def clear(self):
+        with self._lock:
+            cleared = len(self._entries)
+            self._entries.clear()
+            self._versions = None
+            return cleared
+    
+    def stats(self):
+        """Get a snapshot of the cache counters"""
+        with self._lock:
+            return dict(self.counters, entries=len(self._entries))
+
+def init_name_cache(app):
+    """Attach an empty name cache to app"""
+    app.extensions['name_cache'] = NameCache()
+    if not event.contains(db.session, 'after_transaction_end', _forget_transaction_state):
+        event.listen(db.session, 'after_transaction_end', _forget_transaction_state)
+    return app.extensions['name_cache']
+
+def _forget_transaction_state(session, transaction):
+    # The next transaction checks the table versions again
+    if transaction.parent is None:
+        session.info.pop('name_cache_versions', None)
+        session.info.pop('uncommitted_name_keys', None)
+
+def get_name_cache(app=None):
+    """Get the name cache of app (default: the current app), or None if it has none"""
+    return (app or current_app).extensions.get('name_cache')
+
+def _synced_cache():
+    """The current app's name cache, checked against the table versions once per transaction"""
+    cache = get_name_cache()
+    if cache is None:
+        return None, None
+    
+    versions = db.session.info.get('name_cache_versions')
+    if versions is None:
+        current = TableVersion.current(NameCache.TABLES)
+        versions = tuple(current.get(name, 0) for name in NameCache.TABLES)
+        db.session.info['name_cache_versions'] = versions
+        cache.sync(versions)
+    return cache, versions
+
+def _store(cache, values, versions):
+    """Cache values, except sportsbooks created earlier in this transaction, which aren't committed yet"""
+    if cache is not None:
+        uncommitted = db.session.info.get('uncommitted_name_keys', set())
+        cache.set_many({key: value for key, value in values.items() if key not in uncommitted}, versions)
+
+def _split_inputs(inputs):
+    """Split lookup inputs into ids (digit strings and ints) and other names, skipping empty ones"""
+    ids, names = set(), set()
+    for value in inputs:
+        if not value:
+            continue
+        if str(value).isdigit():
+            ids.add(int(value))
+        else:
+            names.add(str(value))
+    return ids, names
+
+def resolve_sportsbooks(inputs, create=True):
+    """
+    Resolve sportsbook ids or names to (sportsbook_id, sportsbook_name) tuples
+    with at most one query for the ids and one for the names, whatever the
+    number of inputs. Names match case-insensitively. Ids that don't exist are
+    treated as names. Unknown names get a new sportsbook (flushed, not
+    committed) when create is set, and resolve to (None, None) otherwise.
+    Returns a dict keyed by the inputs.
+    """
+    inputs = list(inputs)
+    ids, names = _split_inputs(inputs)
+    cache, versions = _synced_cache()
+    
+    by_id = {}
+    if ids:
+        keys = [('sportsbook_id', sportsbook_id) for sportsbook_id in ids]
+        cached = cache.get_many(keys) if cache is not None else {}
+        by_id = {key[1]: value for key, value in cached.items()}
+        missing = [sportsbook_id for sportsbook_id in ids if sportsbook_id not in by_id]
+        if missing:
+            rows = db.session.query(Sportsbook.id, Sportsbook.name).filter(Sportsbook.id.in_(missing)).all()
+            found = {row.id: (row.id, row.name) for row in rows}
+            by_id.update(found)
+            _store(cache, {('sportsbook_id', key): value for key, value in found.items()}, versions)
+        
+        # Digit strings that aren't ids are sportsbook names
+        names.update(str(sportsbook_id) for sportsbook_id in ids if sportsbook_id not in by_id)
+    
+    by_key = {}
+    if names:
+        folded = {Sportsbook.fold_name(name) for name in names}
+        cached = cache.get_many([('sportsbook_name', key) for key in folded]) if cache is not None else {}
+        by_key = {key[1]: value for key, value in cached.items()}
+        missing = [key for key in folded if key not in by_key]
+        if missing:
+            # The lowest id wins if older data has names differing only in case
+            rows = db.session.query(Sportsbook.id, Sportsbook.name, Sportsbook.name_key).filter(
+                Sportsbook.name_key.in_(missing)
+            ).order_by(Sportsbook.id.desc()).all()
+            found = {row.name_key: (row.id, row.name) for row in rows}
+            by_key.update(found)
+            _store(cache, {('sportsbook_name', key): value for key, value in found.items()}, versions)
+        
+        if create:
+            new_sportsbooks = {}
+            for name in names:
+                key = Sportsbook.fold_name(name)
+                if key not in by_key and key not in new_sportsbooks:
+                    new_sportsbooks[key] = Sportsbook(name=name)
+            if new_sportsbooks:
+                db.session.add_all(new_sportsbooks.values())
+                db.session.flush()  # Get the IDs without committing
+                uncommitted = db.session.info.setdefault('uncommitted_name_keys', set())
+                for key, sportsbook in new_sportsbooks.items():
+                    uncommitted.update({('sportsbook_name', key), ('sportsbook_id', sportsbook.id)})
+                by_key.update({key: (sportsbook.id, sportsbook.name) for key, sportsbook in new_sportsbooks.items()})
+    
+    resolved = {}
+    for value in inputs:
+        if not value:
+            resolved[value] = (None, None)
+        elif str(value).isdigit() and int(value) in by_id:
+            resolved[value] = by_id[int(value)]
+        else:
+            resolved[value] = by_key.get(Sportsbook.fold_name(str(value)), (None, None))
+    return resolved
+
+def resolve_accounts(inputs):
+    """
+    Resolve account ids or identifiers to (account_id, account_identifier)
+    tuples with at most one query for the ids and one for the identifiers.
+    Ids that don't exist are treated as identifiers. Unknown accounts resolve
+    to (None, None); accounts are never created here. Returns a dict keyed by the inputs.
+    """
+    inputs = list(inputs)
+    ids, identifiers = _split_inputs(inputs)
+    cache, versions = _synced_cache()
+    
+    by_id = {}
+    if ids:
+        cached = cache.get_many([('account_id', account_id) for account_id in ids]) if cache is not None else {}
+        by_id = {key[1]: value for key, value in cached.items()}
+        missing = [account_id for account_id in ids if account_id not in by_id]
+        if missing:
+            rows = db.session.query(Account.id, Account.account_identifier).filter(Account.id.in_(missing)).all()
+            found = {row.id: (row.id, row.account_identifier) for row in rows}
+            by_id.update(found)
+            _store(cache, {('account_id', key): value for key, value in found.items()}, versions)
+        
+        identifiers.update(str(account_id) for account_id in ids if account_id not in by_id)
+    
+    by_identifier = {}
+    if identifiers:
+        cached = cache.get_many([('account_identifier', identifier) for identifier in identifiers]) if cache is not None else {}
+        by_identifier = {key[1]: value for key, value in cached.items()}
+        missing = [identifier for identifier in identifiers if identifier not in by_identifier]
+        if missing:
+            rows = db.session.query(Account.id, Account.account_identifier).filter(
+                Account.account_identifier.in_(missing)
+            ).all()
+            found = {row.account_identifier: (row.id, row.account_identifier) for row in rows}
+            by_identifier.update(found)
+            _store(cache, {('account_identifier', key): value for key, value in found.items()}, versions)
+    
+    resolved = {}
+    for value in inputs:
+        if not value:
+            resolved[value] = (None, None)
+        elif str(value).isdigit() and int(value) in by_id:
+            resolved[value] = by_id[int(value)]
+        else:
+            resolved[value] = by_identifier.get(str(value), (None, None))
+    return resolved
+
+def resolve_sportsbook_id(sportsbook_input):
+    """
+    Resolve sportsbook ID from either ID or name.
+    Returns (sportsbook_id, sportsbook_name) tuple or (None, None) if not found.
+    Creates sportsbook if it doesn't exist.
+    """
+    return resolve_sportsbooks([sportsbook_input])[sportsbook_input]
+
+def resolve_account_id(account_input):
+    """
+    Resolve account ID from either ID or identifier.
+    Returns (account_id, account_identifier) tuple or (None, None) if not found.
+    """
+    return resolve_accounts([account_input])[account_input]
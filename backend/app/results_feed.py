@@ -0,0 +1,158 @@
+from app import db
+from app.models.bet import Bet
+from app.settlement import SETTLEMENT_RULES, SETTLEMENT_STATUSES, settle_bets
+from urllib.request import urlopen
+import json
+
+RESULT_BATCH_SIZE = 500
+
+def fold_selection(value):
+    return value.strip().casefold() if isinstance(value, str) else value
+
+def parse_result(item):
+    """
+    Parse one result: {event_name, market, outcome?, selections?, void?}. market
+    matches the bet_type of the bets. outcome is the winning selection, which
+    wins while every other selection loses; selections maps selection names to
+    settlement statuses (e.g. half_won) and takes precedence; void: true voids
+    the whole market. Returns ((event_name, market), rule) where rule is
+    (void, outcome, {folded selection: status}). Raises ValueError if invalid.
+    """
+    if not isinstance(item, dict):
+        raise ValueError('Result must be a JSON object')
+    
+    event_name = item.get('event_name')
+    market = item.get('market', item.get('bet_type'))
+    if not isinstance(event_name, str) or not event_name:
+        raise ValueError('event_name is required')
+    if not isinstance(market, str) or not market:
+        raise ValueError('market is required')
+    
+    selections = item.get('selections') or {}
+    if not isinstance(selections, dict):
+        raise ValueError('selections must be an object of selection names to statuses')
+    for status in selections.values():
+        if status not in SETTLEMENT_RULES:
+            raise ValueError(f"selection statuses must be one of: {', '.join(SETTLEMENT_STATUSES)}")
+    
+    # A malformed outcome would lose every bet of the market, and a truthy non-boolean would void it
+    void = item.get('void', False)
+    if not isinstance(void, bool):
+        raise ValueError('void must be true or false')
+    outcome = item.get('outcome')
+    if outcome is not None and (not isinstance(outcome, str) or not outcome.strip()):
+        raise ValueError('outcome must be the name of the winning selection')
+    if not void and outcome is None and not selections:
+        raise ValueError('Result needs an outcome, selections or void')
+    
+    rule = (void, fold_selection(outcome), {fold_selection(name): status for name, status in selections.items()})
+    return (event_name, market), rule
+
+def result_status(rule, selection):
+    """Settlement status of a bet on selection under a parsed result, or None to leave it pending"""
+    void, outcome, selections = rule
+    if void:
+        return 'void'
+    selection = fold_selection(selection)
+    if selection in selections:
+        return selections[selection]
+    if outcome is not None:
+        return 'won' if selection == outcome else 'lost'
+    return None
+
+def load_results(source):
+    """
+    Read results from a local file or an http(s) URL: a JSON array, an object
+    with a results array, or NDJSON with one result per line.
+    """
+    if source.startswith(('http://', 'https://')):
+        with urlopen(source, timeout=30) as response:
+            body = response.read().decode('utf-8')
+    else:
+        with open(source, encoding='utf-8') as f:
+            body = f.read()
+    
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in body.splitlines() if line.strip()]
+    
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return data['results']
+    if not isinstance(data, list):
+        raise ValueError('Results must be a JSON array, an object with a results array, or NDJSON')
+    return data
+
+def settle_results(results, batch_size=RESULT_BATCH_SIZE):
+    """
+    Settle the pending bets matched by results (raw result objects). Bets are
+    matched on (event_name, bet_type) through the (event_name, bet_type, status)
+    index, a batch of results at a time, and each batch is settled with
+    settle_bets and committed on its own. Settled bets are no longer pending,
+    so the same results can be fed again without effect. A repeated result for
+    the same event and market is reported, and when the repeats disagree none
+    of them is applied. Returns a summary with the counts and the invalid
+    results as {index, error}.
+    """
+    rules = {}
+    first_indexes = {}
+    conflicting = set()
+    errors = []
+    for index, item in enumerate(results):
+        try:
+            key, rule = parse_result(item)
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+            continue
+        
+        if key in rules:
+            if rule != rules[key]:
+                conflicting.add(key)
+                error = f'Conflicts with result {first_indexes[key]} for the same event and market; neither is applied'
+            else:
+                error = f'Duplicate of result {first_indexes[key]}'
+            errors.append({'index': index, 'error': error})
+            continue
+        
+        rules[key] = rule
+        first_indexes[key] = index
+    
+    for key in conflicting:
+        del rules[key]
+        errors.append({'index': first_indexes[key], 'error': 'Conflicts with a later result for the same event and market; not applied'})
+    errors.sort(key=lambda error: error['index'])
+    
+    keys = list(rules)
+    matched_keys = set()
+    settled = 0
+    
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start:start + batch_size]
+        # Two plain IN lists seek the index on every backend, where a row-value IN
+        # scans it on SQLite; pairs that only match across results are skipped below
+        pending = db.session.query(Bet.id, Bet.event_name, Bet.bet_type, Bet.selection).filter(
+            Bet.event_name.in_({event_name for event_name, market in batch}),
+            Bet.bet_type.in_({market for event_name, market in batch}),
+            Bet.status == 'pending'
+        ).all()
+        
+        settlements = {}
+        for bet in pending:
+            rule = rules.get((bet.event_name, bet.bet_type))
+            status = result_status(rule, bet.selection) if rule else None
+            if status is not None:
+                settlements[bet.id] = (status, None)
+                matched_keys.add((bet.event_name, bet.bet_type))
+        
+        if settlements:
+            settled += len(settle_bets(settlements))
+            db.session.commit()
+    
+    return {
+        'results': len(rules),
+        'matched_results': len(matched_keys),
+        'unmatched_results': len(rules) - len(matched_keys),
+        'invalid_results': len(errors),
+        'settled': settled,
+        'errors': errors
+    }
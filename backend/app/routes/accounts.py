@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from app.models.account import Account
+from app.models.stats_counter import StatsCounter
+from app.pagination import keyset_paginate
+from app.cache import cached_response, conditional_response, invalidate_on_write
 from datetime import datetime
 from sqlalchemy import desc, asc, or_
 
 accounts_bp = Blueprint('accounts', __name__)
 
+# Bet stats can be filtered by account
+invalidate_on_write(accounts_bp, 'accounts', 'bets', 'transactions')
+
 @accounts_bp.route('/accounts', methods=['GET'])
+@conditional_response(Account)
 def get_accounts():
     """Get all accounts with optional filtering and sorting"""
     try:
@@ -37,6 +44,38 @@ def get_accounts():
             is_active_bool = is_active.lower() in ['true', '1', 'yes']
             query = query.filter(Account.is_active == is_active_bool)
         
+        if 'cursor' in request.args:
+            # Cursor mode: keyed on (sort column, id), an index range scan at any depth
+            sort_columns = {
+                'created_at': Account.created_at,
+                'account_identifier': Account.account_identifier,
+                'name': Account.name
+            }
+            try:
+                accounts, next_cursor = keyset_paginate(
+                    query,
+                    [sort_columns.get(sort_by, Account.created_at), Account.id],
+                    request.args.get('cursor'),
+                    per_page,
+                    descending=sort_order != 'asc'
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            pagination = {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
+            }
+            # The exact total costs a COUNT(*) over the filtered accounts, so it is opt-in
+            if request.args.get('include_total', 'false').lower() in ['true', '1', 'yes']:
+                pagination['total'] = query.count()
+            
+            return jsonify({
+                'accounts': [account.to_dict() for account in accounts],
+                'pagination': pagination
+            })
+        
         # Apply sorting
         sort_column = getattr(Account, sort_by, Account.created_at)
         if sort_order == 'asc':
@@ -200,6 +239,8 @@ def delete_account(account_id):
     try:
         account = Account.query.get_or_404(account_id)
         
+        # Its bets and transactions are left without an account, so are their counters
+        StatsCounter.detach_account(account.id)
         db.session.delete(account)
         db.session.commit()
         
@@ -210,6 +251,8 @@ def delete_account(account_id):
         return jsonify({'error': str(e)}), 500
 
 @accounts_bp.route('/accounts/stats', methods=['GET'])
+@conditional_response(Account)
+@cached_response('accounts')
 def get_account_stats():
     """Get account statistics"""
     try:
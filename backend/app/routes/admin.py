@@ -1,147 +1,150 @@
-from flask import Blueprint, jsonify
-import sqlite3
-import os
+from flask import Blueprint, request, jsonify
 from app import db
+from app.schema import LEGACY_COLUMNS, find_legacy_columns, drop_legacy_columns, get_column_names
+from app.maintenance import prune_stale_arbitrages, get_prune_counters, settle_from_results, get_settlement_counters
+from app.results_feed import load_results
+from app.bulk import iter_bulk_payload
+from app.cache import get_response_cache, invalidate_on_write
+from app.resolvers import get_name_cache
 
 admin_bp = Blueprint('admin', __name__)
 
+# Schema fixes can change anything
+invalidate_on_write(admin_bp, 'arbitrages', 'bets', 'transactions', 'accounts', 'sportsbooks')
+
 @admin_bp.route('/admin/fix-schema', methods=['GET', 'POST'])
 def fix_database_schema():
     """Special endpoint to fix database schema"""
     try:
-        from flask import current_app
+        result = {'message': 'Schema check completed', 'changes': []}
         
-        # Get database path
-        db_path = os.path.join(current_app.instance_path, 'bettracker.db')
+        # Report what is there before dropping anything
+        legacy_columns = find_legacy_columns()
+        for table_name in LEGACY_COLUMNS:
+            if table_name in legacy_columns:
+                columns = ', '.join(legacy_columns[table_name])
+                result['changes'].append(f'Found legacy {columns} column(s) in {table_name} table')
+            else:
+                result['changes'].append(f'No legacy columns found in {table_name} table')
         
-        if not os.path.exists(db_path):
-            return jsonify({'error': f'Database not found at {db_path}'}), 404
+        for table_name, column in drop_legacy_columns():
+            result['changes'].append(f'Dropped legacy {column} column from {table_name} table')
         
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        # Verify the fix
+        result['new_bet_columns'] = get_column_names('bet')
+        result['new_transaction_columns'] = get_column_names('transaction')
+        result['success'] = True
         
-        # Check bet table schema
-        cursor.execute("PRAGMA table_info(bet)")
-        bet_columns = cursor.fetchall()
-        bet_column_names = [col[1] for col in bet_columns]
+        return jsonify(result), 200
         
-        result = {'message': 'Schema check completed', 'changes': []}
+    except Exception as e:
+        return jsonify({'error': str(e), 'success': False}), 500
+
+@admin_bp.route('/admin/arbitrage-pruning', methods=['GET'])
+def get_arbitrage_pruning_stats():
+    """Get the counters and settings of the arbitrage pruning job"""
+    from flask import current_app
+    
+    return jsonify({
+        'counters': get_prune_counters(),
+        'interval_seconds': current_app.config.get('ARBITRAGE_PRUNE_INTERVAL'),
+        'ttl_hours': current_app.config.get('ARBITRAGE_TTL_HOURS'),
+        'batch_size': current_app.config.get('ARBITRAGE_PRUNE_BATCH_SIZE')
+    })
+
+@admin_bp.route('/admin/arbitrage-pruning', methods=['POST'])
+def run_arbitrage_pruning():
+    """Prune stale arbitrages now"""
+    try:
+        from flask import current_app
         
-        if 'sportsbook' in bet_column_names:
-            result['changes'].append('Found legacy sportsbook column in bet table')
-            
-            # Get existing data
-            cursor.execute("""
-                SELECT id, sport, event_name, bet_type, selection, 
-                       sportsbook_id, account_id, odds, stake, status, 
-                       potential_payout, actual_payout, profit_loss, 
-                       date_placed, date_settled, kickoff, notes 
-                FROM bet
-            """)
-            bet_data = cursor.fetchall()
-            
-            # Drop and recreate table
-            cursor.execute("DROP TABLE bet")
-            cursor.execute("""
-                CREATE TABLE bet (
-                    id INTEGER NOT NULL PRIMARY KEY,
-                    sport VARCHAR(100) NOT NULL,
-                    event_name VARCHAR(200) NOT NULL,
-                    bet_type VARCHAR(100) NOT NULL,
-                    selection VARCHAR(200) NOT NULL,
-                    sportsbook_id INTEGER,
-                    account_id INTEGER,
-                    odds FLOAT NOT NULL,
-                    stake FLOAT NOT NULL,
-                    status VARCHAR(20) NOT NULL DEFAULT 'pending',
-                    potential_payout FLOAT NOT NULL,
-                    actual_payout FLOAT DEFAULT 0.0,
-                    profit_loss FLOAT DEFAULT 0.0,
-                    date_placed DATETIME NOT NULL,
-                    date_settled DATETIME,
-                    kickoff DATETIME,
-                    notes TEXT,
-                    FOREIGN KEY(sportsbook_id) REFERENCES sportsbook (id),
-                    FOREIGN KEY(account_id) REFERENCES accounts (id)
-                )
-            """)
-            
-            # Restore data
-            for row in bet_data:
-                cursor.execute("""
-                    INSERT INTO bet VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, row)
-            
-            result['changes'].append(f'Fixed bet table - restored {len(bet_data)} records')
-        else:
-            result['changes'].append('No legacy columns found in bet table')
+        data = request.get_json(silent=True) or {}
+        pruned = prune_stale_arbitrages(
+            ttl_hours=data.get('ttl_hours', current_app.config.get('ARBITRAGE_TTL_HOURS')),
+            batch_size=current_app.config.get('ARBITRAGE_PRUNE_BATCH_SIZE', 500)
+        )
         
-        # Check transaction table
-        cursor.execute("PRAGMA table_info(transaction)")
-        transaction_columns = cursor.fetchall()
-        transaction_column_names = [col[1] for col in transaction_columns]
+        return jsonify({
+            'message': f'Pruned {pruned} stale arbitrage opportunities',
+            'pruned': pruned,
+            'counters': get_prune_counters()
+        })
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/admin/results-settlement', methods=['GET'])
+def get_results_settlement_stats():
+    """Get the counters and settings of the results-feed settlement job"""
+    from flask import current_app
+    
+    return jsonify({
+        'counters': get_settlement_counters(),
+        'feed': current_app.config.get('RESULTS_FEED'),
+        'interval_seconds': current_app.config.get('RESULTS_SETTLE_INTERVAL'),
+        'batch_size': current_app.config.get('RESULTS_SETTLE_BATCH_SIZE')
+    })
+
+@admin_bp.route('/admin/results-settlement', methods=['POST'])
+def run_results_settlement():
+    """
+    Settle pending bets from the results in the request body (a JSON array or
+    NDJSON), or from RESULTS_FEED when the body is empty
+    """
+    try:
+        from flask import current_app
         
-        if 'sportsbook' in transaction_column_names:
-            result['changes'].append('Found legacy sportsbook column in transaction table')
-            
-            # Get existing data  
-            cursor.execute("""
-                SELECT id, transaction_type, sportsbook_id, account_id, 
-                       amount, tax, transaction_charges, payment_method, 
-                       reference_id, status, date_created, date_processed, notes 
-                FROM transaction
-            """)
-            transaction_data = cursor.fetchall()
-            
-            # Drop and recreate
-            cursor.execute("DROP TABLE transaction")
-            cursor.execute("""
-                CREATE TABLE transaction (
-                    id INTEGER NOT NULL PRIMARY KEY,
-                    transaction_type VARCHAR(20) NOT NULL,
-                    sportsbook_id INTEGER,
-                    account_id INTEGER,
-                    amount FLOAT NOT NULL,
-                    tax FLOAT NOT NULL DEFAULT 0.0,
-                    transaction_charges FLOAT NOT NULL DEFAULT 0.0,
-                    payment_method VARCHAR(50),
-                    reference_id VARCHAR(100),
-                    status VARCHAR(20) DEFAULT 'completed',
-                    date_created DATETIME,
-                    date_processed DATETIME,
-                    notes TEXT,
-                    FOREIGN KEY(sportsbook_id) REFERENCES sportsbook (id),
-                    FOREIGN KEY(account_id) REFERENCES accounts (id)
-                )
-            """)
-            
-            # Restore data
-            for row in transaction_data:
-                cursor.execute("""
-                    INSERT INTO transaction VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, row)
-            
-            result['changes'].append(f'Fixed transaction table - restored {len(transaction_data)} records')
+        json_errors = {}
+        if request.content_length:
+            # Unparseable NDJSON lines stay in the list, so the summary's indexes match the body
+            results = []
+            for index, (payload, error) in enumerate(iter_bulk_payload()):
+                results.append(payload)
+                if error:
+                    json_errors[index] = error
+        elif current_app.config.get('RESULTS_FEED'):
+            results = load_results(current_app.config['RESULTS_FEED'])
         else:
-            result['changes'].append('No legacy columns found in transaction table')
-        
-        conn.commit()
-        conn.close()
-        
-        # Verify the fix
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(bet)")
-        new_bet_columns = [col[1] for col in cursor.fetchall()]
-        cursor.execute("PRAGMA table_info(transaction)")
-        new_transaction_columns = [col[1] for col in cursor.fetchall()]
-        conn.close()
-        
-        result['new_bet_columns'] = new_bet_columns
-        result['new_transaction_columns'] = new_transaction_columns
-        result['success'] = True
+            return jsonify({'error': 'Send results in the request body or set RESULTS_FEED'}), 400
         
-        return jsonify(result), 200
+        summary = settle_from_results(results, batch_size=current_app.config.get('RESULTS_SETTLE_BATCH_SIZE', 500))
+        for error in summary['errors']:
+            error['error'] = json_errors.get(error['index'], error['error'])
         
+        return jsonify({
+            'message': f"Settled {summary['settled']} bets from {summary['results']} results",
+            **summary,
+            'counters': get_settlement_counters()
+        })
+    
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    
     except Exception as e:
-        return jsonify({'error': str(e), 'success': False}), 500
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/admin/cache', methods=['GET'])
+def get_response_cache_stats():
+    """Get the hit/miss counters and settings of the response cache and the sportsbook/account name cache"""
+    cache = get_response_cache()
+    name_cache = get_name_cache()
+    return jsonify({
+        'cache': cache.stats() if cache is not None else None,
+        'name_cache': name_cache.stats() if name_cache is not None else None
+    })
+
+@admin_bp.route('/admin/cache/clear', methods=['POST'])
+def clear_response_cache():
+    """Drop every cached response and name lookup"""
+    cache = get_response_cache()
+    cleared = cache.clear() if cache is not None else 0
+    name_cache = get_name_cache()
+    if name_cache is not None:
+        name_cache.clear()
+    return jsonify({
+        'message': f'Cleared {cleared} cached responses',
+        'cleared': cleared
+    })
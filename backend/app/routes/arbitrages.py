@@ -1,67 +1,40 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify
 from app import db
 from app.models.arbitrage import Arbitrage
+from app.models.arbitrage_group import ArbitrageGroup
 from app.models.bet import Bet
-from app.models.account import Account
-from app.models.sportsbook import Sportsbook
+from app.models.stats_counter import StatsCounter
+from app.bulk import iter_bulk_payload
+from app.datetime_utils import parse_datetime, to_utc_iso
+from app.resolvers import resolve_accounts, resolve_sportsbooks
+from app.cache import cached_response, conditional_response, invalidate_on_write
+from app.events import format_event, get_event_broker, has_arbitrage_subscribers, publish_arbitrage_changes
 from datetime import datetime
 from sqlalchemy import desc, asc, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 import json
+import math
 from collections import defaultdict
 import os
 
 arbitrages_bp = Blueprint('arbitrages', __name__)
 
-def resolve_sportsbook_id(sportsbook_input):
-    """
-    Resolve sportsbook ID from either ID or name.
-    Returns (sportsbook_id, sportsbook_name) tuple or (None, None) if not found.
-    Creates sportsbook if it doesn't exist.
-    """
-    if not sportsbook_input:
-        return None, None
-    
-    # If it's a number, treat it as ID
-    if str(sportsbook_input).isdigit():
-        sportsbook = Sportsbook.query.get(int(sportsbook_input))
-        if sportsbook:
-            return sportsbook.id, sportsbook.name
-    
-    # Otherwise, treat it as name and try to find it
-    sportsbook = Sportsbook.get_by_name(str(sportsbook_input))
-    if sportsbook:
-        return sportsbook.id, sportsbook.name
-    
-    # If not found, create new sportsbook
-    sportsbook = Sportsbook.create_if_not_exists(str(sportsbook_input))
-    db.session.add(sportsbook)
-    db.session.flush()  # Get the ID without committing
-    return sportsbook.id, sportsbook.name
+# Adding arbitrages to bets creates bets too
+invalidate_on_write(arbitrages_bp, 'arbitrages', 'bets', 'accounts', 'sportsbooks')
 
-def resolve_account_id(account_input):
-    """
-    Resolve account ID from either ID or identifier.
-    Returns (account_id, account_identifier) tuple or (None, None) if not found.
-    """
-    if not account_input:
-        return None, None
-    
-    # If it's a number, treat it as ID
-    if str(account_input).isdigit():
-        account = Account.query.get(int(account_input))
-        if account:
-            return account.id, account.account_identifier
-    
-    # Otherwise, treat it as identifier and try to find it
-    account = Account.query.filter_by(account_identifier=str(account_input)).first()
-    if account:
-        return account.id, account.account_identifier
-    
-    # If not found, return None (don't auto-create accounts)
-    return None, None
-    return None
+def parse_kickoff_range(args):
+    """Parse the kickoff_from/kickoff_to query parameters. Raises ValueError on a bad value."""
+    kickoff_from = args.get('kickoff_from')
+    kickoff_to = args.get('kickoff_to')
+    return (
+        parse_datetime(kickoff_from) if kickoff_from else None,
+        parse_datetime(kickoff_to) if kickoff_to else None
+    )
 
 @arbitrages_bp.route('/arbitrages/grouped', methods=['GET'])
+@conditional_response(Arbitrage, ArbitrageGroup)
+@cached_response('arbitrages')
 def get_grouped_arbitrages():
     """Get arbitrage opportunities grouped by match signature with pagination - returns only top arbitrage per group"""
     try:
@@ -73,63 +46,74 @@ def get_grouped_arbitrages():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
         
-        # Build query
-        query = Arbitrage.query
-        
-        if min_profit is not None:
-            query = query.filter(Arbitrage.profit >= min_profit)
-        
-        if max_profit is not None:
-            query = query.filter(Arbitrage.profit <= max_profit)
-        
-        # Get all arbitrages that match filters
-        all_arbitrages = query.all()
+        try:
+            kickoff_from, kickoff_to = parse_kickoff_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Group by match_signature
-        grouped_arbitrages = defaultdict(list)
-        for arbitrage in all_arbitrages:
-            grouped_arbitrages[arbitrage.match_signature].append(arbitrage)
+        start_index = (page - 1) * per_page
+        end_index = start_index + per_page
         
-        # Get the best arbitrage for each group and prepare grouped data
-        best_arbitrages = []
-        for match_signature, arbitrages in grouped_arbitrages.items():
-            # Sort arbitrages in this group by profit (descending)
-            sorted_arbitrages = sorted(arbitrages, key=lambda x: x.profit, reverse=True)
-            best_arbitrage = sorted_arbitrages[0]
+        if min_profit is None and max_profit is None:
+            # Unfiltered view - read the maintained summary table
+            query = ArbitrageGroup.query.options(joinedload(ArbitrageGroup.best_arbitrage))
             
-            # Extract market information from combination_details
-            try:
-                combination_details = json.loads(best_arbitrage.combination_details)
-                markets = list(set(detail.get('market', 'Unknown') for detail in combination_details))
-            except (json.JSONDecodeError, AttributeError):
-                markets = ['Unknown']
+            if kickoff_from is not None:
+                query = query.filter(ArbitrageGroup.kickoff_datetime >= kickoff_from)
+            
+            if kickoff_to is not None:
+                query = query.filter(ArbitrageGroup.kickoff_datetime <= kickoff_to)
             
-            # Create grouped entry - only top arbitrage with summary info
-            grouped_entry = {
-                'match_signature': match_signature,
-                'best_arbitrage': best_arbitrage.to_dict(),
-                'total_arbitrages': len(arbitrages),
-                'max_profit': max(arb.profit for arb in arbitrages),
-                'min_profit': min(arb.profit for arb in arbitrages),
-                'markets_count': len(markets),
-                'markets': markets
+            total_groups = query.count()
+            
+            sort_columns = {
+                'profit': ArbitrageGroup.max_profit,
+                'kickoff_datetime': ArbitrageGroup.kickoff_datetime,
+                'created_at': ArbitrageGroup.best_created_at
             }
+            sort_column = sort_columns.get(sort_by)
+            if sort_column is not None:
+                if sort_order == 'desc':
+                    query = query.order_by(desc(sort_column), asc(ArbitrageGroup.best_arbitrage_id))
+                else:
+                    query = query.order_by(asc(sort_column), asc(ArbitrageGroup.best_arbitrage_id))
             
-            best_arbitrages.append(grouped_entry)
-        
-        # Sort the grouped results
-        if sort_by == 'profit':
-            best_arbitrages.sort(key=lambda x: x['best_arbitrage']['profit'], reverse=(sort_order == 'desc'))
-        elif sort_by == 'kickoff_datetime':
-            best_arbitrages.sort(key=lambda x: x['best_arbitrage']['kickoff_datetime'], reverse=(sort_order == 'desc'))
-        elif sort_by == 'created_at':
-            best_arbitrages.sort(key=lambda x: x['best_arbitrage']['created_at'], reverse=(sort_order == 'desc'))
-        
-        # Apply pagination
-        total_groups = len(best_arbitrages)
-        start_index = (page - 1) * per_page
-        end_index = start_index + per_page
-        paginated_groups = best_arbitrages[start_index:end_index]
+            groups = query.offset(start_index).limit(per_page).all()
+            paginated_groups = [group.to_dict() for group in groups]
+        else:
+            # Profit filters change the group aggregates, so rank the
+            # matching arbitrages with window functions in the database
+            query = ArbitrageGroup.ranked_query(min_profit, max_profit, kickoff_from=kickoff_from, kickoff_to=kickoff_to)
+            total_groups = query.count()
+            
+            sort_columns = {
+                'profit': Arbitrage.profit,
+                'kickoff_datetime': Arbitrage.kickoff_datetime,
+                'created_at': Arbitrage.created_at
+            }
+            sort_column = sort_columns.get(sort_by)
+            if sort_column is not None:
+                if sort_order == 'desc':
+                    query = query.order_by(desc(sort_column), asc(Arbitrage.id))
+                else:
+                    query = query.order_by(asc(sort_column), asc(Arbitrage.id))
+            
+            rows = query.offset(start_index).limit(per_page).all()
+            
+            paginated_groups = []
+            for best_arbitrage, total_arbitrages, group_max_profit, group_min_profit in rows:
+                markets = ArbitrageGroup.extract_markets(best_arbitrage.combination_details)
+                
+                # Create grouped entry - only top arbitrage with summary info
+                paginated_groups.append({
+                    'match_signature': best_arbitrage.match_signature,
+                    'best_arbitrage': best_arbitrage.to_dict(),
+                    'total_arbitrages': total_arbitrages,
+                    'max_profit': group_max_profit,
+                    'min_profit': group_min_profit,
+                    'markets_count': len(markets),
+                    'markets': markets
+                })
         
         return jsonify({
             'groups': paginated_groups,
@@ -169,45 +153,33 @@ def get_arbitrages_by_match_signature(match_signature):
         if not arbitrages:
             return jsonify({'error': 'No arbitrages found for this match signature'}), 404
         
-        # Extract match info from first arbitrage's combination_details
+        # Match info comes from the columns extracted on write
+        first_arbitrage = arbitrages[0]
         match_info = {}
-        try:
-            first_arb_details = json.loads(arbitrages[0].combination_details)
-            if first_arb_details:
-                first_detail = first_arb_details[0]
-                match_info = {
-                    'home_team': first_detail.get('home_team', 'Unknown'),
-                    'away_team': first_detail.get('away_team', 'Unknown'),
-                    'league': first_detail.get('league', 'Unknown'),
-                    'country': first_detail.get('country', 'Unknown'),
-                    'kickoff_datetime': arbitrages[0].kickoff_datetime
-                }
-        except (json.JSONDecodeError, IndexError, KeyError):
+        if first_arbitrage.market is not None:
             match_info = {
-                'home_team': 'Unknown',
-                'away_team': 'Unknown',
-                'league': 'Unknown',
-                'country': 'Unknown',
-                'kickoff_datetime': arbitrages[0].kickoff_datetime
+                'home_team': first_arbitrage.home_team,
+                'away_team': first_arbitrage.away_team,
+                'league': first_arbitrage.league,
+                'country': first_arbitrage.country,
+                'kickoff_datetime': to_utc_iso(first_arbitrage.kickoff_datetime)
             }
         
         # Group by market for better organization
+        arbitrage_dicts = []
         markets_data = defaultdict(list)
         all_markets = set()
         
         for arb in arbitrages:
-            try:
-                combination_details = json.loads(arb.combination_details)
-                market = combination_details[0].get('market', 'Unknown') if combination_details else 'Unknown'
-                all_markets.add(market)
-                markets_data[market].append(arb.to_dict())
-            except (json.JSONDecodeError, IndexError, KeyError):
-                markets_data['Unknown'].append(arb.to_dict())
-                all_markets.add('Unknown')
+            market = arb.market or 'Unknown'
+            arb_dict = arb.to_dict()
+            arbitrage_dicts.append(arb_dict)
+            all_markets.add(market)
+            markets_data[market].append(arb_dict)
         
         return jsonify({
             'match_signature': match_signature,
-            'arbitrages': [arb.to_dict() for arb in arbitrages],
+            'arbitrages': arbitrage_dicts,
             'markets_data': dict(markets_data),
             'total_count': len(arbitrages),
             'max_profit': max(arb.profit for arb in arbitrages),
@@ -220,6 +192,7 @@ def get_arbitrages_by_match_signature(match_signature):
         return jsonify({'error': str(e)}), 500
 
 @arbitrages_bp.route('/arbitrages', methods=['GET'])
+@conditional_response(Arbitrage)
 def get_arbitrages():
     """Get all arbitrage opportunities with optional filtering"""
     try:
@@ -229,14 +202,13 @@ def get_arbitrages():
         sort_by = request.args.get('sort_by', 'profit')  # profit, kickoff_datetime, created_at
         sort_order = request.args.get('sort_order', 'desc')  # asc or desc
         
-        # Build query
-        query = Arbitrage.query
-        
-        if min_profit is not None:
-            query = query.filter(Arbitrage.profit >= min_profit)
+        try:
+            kickoff_from, kickoff_to = parse_kickoff_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if max_profit is not None:
-            query = query.filter(Arbitrage.profit <= max_profit)
+        # Build query
+        query = Arbitrage.apply_filters(Arbitrage.query, min_profit, max_profit, kickoff_from, kickoff_to)
         
         # Apply sorting
         sort_column = getattr(Arbitrage, sort_by, Arbitrage.profit)
@@ -252,34 +224,150 @@ def get_arbitrages():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+BULK_INSERT_BATCH_SIZE = 5000
+
+def build_arbitrage_row(data):
+    """
+    Validate one arbitrage payload and build its column values for an upsert.
+    Raises ValueError with a message describing the problem.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Arbitrage must be a JSON object')
+    
+    # Validate required fields
+    required_fields = ['profit', 'match_signature', 'kickoff_datetime', 'combination_details']
+    for field in required_fields:
+        if data.get(field) is None:
+            raise ValueError(f'{field} is required')
+    
+    try:
+        profit = float(data['profit'])
+    except (ValueError, TypeError):
+        raise ValueError('Invalid profit format')
+    
+    try:
+        kickoff_datetime = parse_datetime(data['kickoff_datetime'])
+    except ValueError:
+        raise ValueError('Invalid kickoff_datetime format')
+    
+    # Ensure combination_details is a JSON string, parsing it only when needed
+    combination_details = data['combination_details']
+    if isinstance(combination_details, (list, dict)):
+        combination_data = combination_details
+        combination_details = json.dumps(combination_details)
+    else:
+        combination_data = Arbitrage.parse_combination_details(combination_details)
+    
+    row = {
+        'profit': profit,
+        'match_signature': data['match_signature'],
+        'kickoff_datetime': kickoff_datetime,
+        'combination_details': combination_details
+    }
+    row.update(Arbitrage.match_fields(combination_data))
+    row['combination_hash'] = Arbitrage.compute_combination_hash(combination_data)
+    return row
+
 @arbitrages_bp.route('/arbitrages', methods=['POST'])
 def create_arbitrage():
     """Create a new arbitrage opportunity"""
     try:
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['profit', 'match_signature', 'kickoff_datetime', 'combination_details']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} is required'}), 400
-        
-        # Ensure combination_details is a JSON string
-        combination_details = data['combination_details']
-        if isinstance(combination_details, (list, dict)):
-            combination_details = json.dumps(combination_details)
-        
-        arbitrage = Arbitrage(
-            profit=float(data['profit']),
-            match_signature=data['match_signature'],
-            kickoff_datetime=data['kickoff_datetime'],
-            combination_details=combination_details
+        try:
+            row = build_arbitrage_row(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Upsert so that rescanning the same opportunity refreshes it instead of duplicating it
+        statement = Arbitrage.upsert_statement(datetime.now()).returning(Arbitrage.__table__.c.id)
+        arbitrage_id = db.session.execute(statement, row).scalar_one()
+        arbitrage = db.session.get(Arbitrage, arbitrage_id, populate_existing=True)
+        
+        # A fresh insert still has matching timestamps
+        created = arbitrage.created_at == arbitrage.updated_at
+        if created:
+            ArbitrageGroup.record_arbitrage(arbitrage)
+        else:
+            ArbitrageGroup.refresh(arbitrage.match_signature)
+        db.session.commit()
+        
+        publish_arbitrage_changes(
+            inserted_ids=[arbitrage.id] if created else [],
+            updated_ids=[] if created else [arbitrage.id]
         )
         
-        db.session.add(arbitrage)
+        return jsonify(arbitrage.to_dict()), 201 if created else 200
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@arbitrages_bp.route('/arbitrages/bulk', methods=['POST'])
+def bulk_create_arbitrages():
+    """Create or refresh many arbitrage opportunities in one transaction using batched upserts"""
+    try:
+        # Timestamps are bound once per statement instead of once per row
+        upsert_statement = Arbitrage.upsert_statement(datetime.now())
+        batch = {}
+        errors = []
+        upserted = 0
+        match_signatures = set()
+        
+        # Tell inserts from updates apart only when the stream has listeners
+        publishing = has_arbitrage_subscribers()
+        if publishing:
+            table = Arbitrage.__table__
+            upsert_statement = upsert_statement.returning(table.c.id, table.c.created_at == table.c.updated_at)
+        inserted_ids = []
+        updated_ids = []
+        
+        def execute_batch(rows):
+            result = db.session.execute(upsert_statement, rows)
+            if publishing:
+                for arbitrage_id, created in result:
+                    (inserted_ids if created else updated_ids).append(arbitrage_id)
+        
+        try:
+            for index, (data, error) in enumerate(iter_bulk_payload()):
+                if error is None:
+                    try:
+                        row = build_arbitrage_row(data)
+                    except ValueError as e:
+                        error = str(e)
+                
+                if error is not None:
+                    errors.append({'index': index, 'error': error})
+                    continue
+                
+                # A repeated opportunity within the payload keeps its last values
+                batch[(row['match_signature'], row['combination_hash'])] = row
+                match_signatures.add(row['match_signature'])
+                
+                if len(batch) >= BULK_INSERT_BATCH_SIZE:
+                    execute_batch(list(batch.values()))
+                    upserted += len(batch)
+                    batch = {}
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+        
+        if batch:
+            execute_batch(list(batch.values()))
+            upserted += len(batch)
+        
+        # Keep the group summaries in sync
+        ArbitrageGroup.refresh_many(match_signatures)
         db.session.commit()
         
-        return jsonify(arbitrage.to_dict()), 201
+        publish_arbitrage_changes(inserted_ids=inserted_ids, updated_ids=updated_ids, match_signatures=match_signatures)
+        
+        return jsonify({
+            'message': f'Successfully saved {upserted} arbitrage opportunities',
+            'upserted_count': upserted,
+            'error_count': len(errors),
+            'errors': errors
+        }), 201 if upserted or not errors else 400
     
     except Exception as e:
         db.session.rollback()
@@ -291,6 +379,7 @@ def update_arbitrage(arbitrage_id):
     try:
         arbitrage = Arbitrage.query.get_or_404(arbitrage_id)
         data = request.get_json()
+        previous_signature = arbitrage.match_signature
         
         # Update fields if provided
         if 'profit' in data:
@@ -300,21 +389,36 @@ def update_arbitrage(arbitrage_id):
             arbitrage.match_signature = data['match_signature']
         
         if 'kickoff_datetime' in data:
-            arbitrage.kickoff_datetime = data['kickoff_datetime']
+            try:
+                arbitrage.kickoff_datetime = parse_datetime(data['kickoff_datetime'])
+            except ValueError:
+                return jsonify({'error': 'Invalid kickoff_datetime format'}), 400
         
         if 'combination_details' in data:
             combination_details = data['combination_details']
             if isinstance(combination_details, (list, dict)):
                 combination_details = json.dumps(combination_details)
             arbitrage.combination_details = combination_details
+            arbitrage.extract_match_fields()
         
         # Update the updated_at timestamp
         arbitrage.updated_at = datetime.now()
         
+        # Keep the group summaries in sync
+        ArbitrageGroup.refresh(arbitrage.match_signature)
+        if previous_signature != arbitrage.match_signature:
+            ArbitrageGroup.refresh(previous_signature)
+        
         db.session.commit()
         
+        publish_arbitrage_changes(updated_ids=[arbitrage.id], match_signatures=[previous_signature])
+        
         return jsonify(arbitrage.to_dict())
     
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'This arbitrage combination already exists for the match'}), 400
+    
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -324,23 +428,85 @@ def delete_arbitrage(arbitrage_id):
     """Delete an arbitrage opportunity"""
     try:
         arbitrage = Arbitrage.query.get_or_404(arbitrage_id)
+        match_signature = arbitrage.match_signature
         db.session.delete(arbitrage)
+        db.session.flush()
+        ArbitrageGroup.refresh(match_signature)
         db.session.commit()
         
+        publish_arbitrage_changes(deleted=[(arbitrage_id, match_signature)])
+        
         return jsonify({'message': 'Arbitrage opportunity deleted successfully'})
     
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@arbitrages_bp.route('/arbitrages/stream', methods=['GET'])
+def stream_arbitrages():
+    """
+    Stream arbitrage inserts, updates and deletions, followed by the resulting
+    group changes, as server-sent events. A 'resync' event asks the client to
+    refetch because it fell too far behind.
+    """
+    broker = get_event_broker()
+    heartbeat = current_app.config.get('ARBITRAGE_STREAM_HEARTBEAT', 15)
+    subscription = broker.subscribe()
+    
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                message = subscription.get(timeout=heartbeat)
+                
+                if subscription.closed:
+                    # The server is shutting down; the client reconnects after the retry delay
+                    break
+                elif subscription.overflowed:
+                    subscription.drain()
+                    yield format_event('resync', {})
+                elif message is None:
+                    # Comment line that keeps proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                else:
+                    yield message
+        finally:
+            broker.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @arbitrages_bp.route('/arbitrages/stats', methods=['GET'])
+@conditional_response(Arbitrage)
+@cached_response('arbitrages')
 def get_arbitrage_stats():
-    """Get arbitrage statistics"""
+    """Get arbitrage statistics, honoring the same filters as the grouped view"""
     try:
-        # Get all arbitrages
-        arbitrages = Arbitrage.query.all()
-        
-        if not arbitrages:
+        try:
+            kickoff_from, kickoff_to = parse_kickoff_range(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        filters = {
+            'min_profit': request.args.get('min_profit', type=float),
+            'max_profit': request.args.get('max_profit', type=float),
+            'kickoff_from': kickoff_from,
+            'kickoff_to': kickoff_to
+        }
+        
+        total_opportunities, average_profit, max_profit, min_profit = Arbitrage.apply_filters(
+            db.session.query(
+                func.count(Arbitrage.id),
+                func.avg(Arbitrage.profit),
+                func.max(Arbitrage.profit),
+                func.min(Arbitrage.profit)
+            ),
+            **filters
+        ).one()
+        
+        if not total_opportunities:
             return jsonify({
                 'total_opportunities': 0,
                 'active_opportunities': 0,
@@ -348,40 +514,27 @@ def get_arbitrage_stats():
                 'max_profit': 0,
                 'min_profit': 0,
                 'most_common_market': None,
-                'most_common_league': None
+                'most_common_league': None,
+                'league_distribution': {}
             })
         
-        # Calculate statistics
-        profits = [arb.profit for arb in arbitrages]
+        # Market and league histograms from the extracted columns
+        most_common_market = Arbitrage.apply_filters(db.session.query(Arbitrage.market), **filters).filter(
+            Arbitrage.market.isnot(None)
+        ).group_by(Arbitrage.market).order_by(desc(func.count(Arbitrage.id))).limit(1).scalar()
         
-        # Extract market and league information from combination_details
-        market_counts = {}
-        league_counts = {}
-        
-        for arb in arbitrages:
-            try:
-                combination_details = json.loads(arb.combination_details)
-                if combination_details:
-                    # Get market from first combination detail
-                    market = combination_details[0].get('market', 'Unknown')
-                    market_counts[market] = market_counts.get(market, 0) + 1
-                    
-                    # Get league from first combination detail
-                    league = combination_details[0].get('league', 'Unknown')
-                    if league != 'Unknown':
-                        league_counts[league] = league_counts.get(league, 0) + 1
-            except (json.JSONDecodeError, IndexError, KeyError):
-                market_counts['Unknown'] = market_counts.get('Unknown', 0) + 1
-        
-        most_common_market = max(market_counts.items(), key=lambda x: x[1])[0] if market_counts else None
-        most_common_league = max(league_counts.items(), key=lambda x: x[1])[0] if league_counts else None
+        league_rows = Arbitrage.apply_filters(db.session.query(Arbitrage.league, func.count(Arbitrage.id)), **filters).filter(
+            Arbitrage.league.isnot(None),
+            Arbitrage.league != 'Unknown'
+        ).group_by(Arbitrage.league).all()
+        league_counts = {league: count for league, count in league_rows}
         
         return jsonify({
-            'total_opportunities': len(arbitrages),
-            'active_opportunities': len(arbitrages),  # All are considered active in simplified model
-            'average_profit': round(sum(profits) / len(profits), 2) if profits else 0,
-            'max_profit': round(max(profits), 2) if profits else 0,
-            'min_profit': round(min(profits), 2) if profits else 0,
+            'total_opportunities': total_opportunities,
+            'active_opportunities': total_opportunities,  # All are considered active in simplified model
+            'average_profit': round(average_profit, 2),
+            'max_profit': round(max_profit, 2),
+            'min_profit': round(min_profit, 2),
             'most_common_market': most_common_market,
             'league_distribution': league_counts
         })
@@ -389,6 +542,94 @@ def get_arbitrage_stats():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def parse_combination_details(value):
+    """Combination details as stored (JSON text) or sent (a list). Raises ValueError if there are none."""
+    try:
+        combination_details = json.loads(value) if isinstance(value, str) else value
+    except json.JSONDecodeError:
+        raise ValueError('Invalid combination details format')
+    
+    if not combination_details or not isinstance(combination_details, list):
+        raise ValueError('No betting combinations found')
+    return combination_details
+
+def arbitrage_bet_legs(combination_details, stakes_data, default_stake, default_account):
+    """
+    (bookmaker, odds, selection, stake, account) of every leg. stakes_data is a
+    list of {stake, account} objects by leg (new format), a dict of stakes keyed
+    by leg index (old format), or None for the defaults.
+    """
+    legs = []
+    for i, combo in enumerate(combination_details):
+        if isinstance(stakes_data, list) and i < len(stakes_data):
+            bet_data = stakes_data[i]
+            stake = float(bet_data.get('stake', default_stake))
+            account = bet_data.get('account', default_account)
+        elif isinstance(stakes_data, dict):
+            stake = float(stakes_data.get(str(i), default_stake))
+            account = default_account
+        else:
+            stake = default_stake
+            account = default_account
+        
+        legs.append((
+            combo.get('bookmaker', 'Unknown'),
+            float(combo.get('odds', 1.0)),
+            combo.get('name', 'Unknown Selection'),
+            stake,
+            account
+        ))
+    return legs
+
+def build_arbitrage_bets(combination_details, legs, kickoff, profit, sportsbooks, accounts):
+    """
+    Pending bets for the legs of one arbitrage, added to the session.
+    sportsbooks and accounts are resolve_sportsbooks/resolve_accounts results
+    covering every leg.
+    """
+    # Match information comes from the first combination
+    first_combo = combination_details[0]
+    event_name = f"{first_combo.get('home_team', 'Team A')} vs {first_combo.get('away_team', 'Team B')}"
+    market = first_combo.get('market', 'Unknown Market')
+    
+    bets = []
+    for bookmaker, odds, selection, stake, account in legs:
+        bet = Bet(
+            sport='Football',  # Assuming football for now
+            event_name=event_name,
+            bet_type=market,
+            selection=selection,
+            sportsbook_id=sportsbooks[bookmaker][0],
+            account_id=accounts[account][0],
+            odds=odds,
+            stake=stake,
+            status='pending',
+            potential_payout=stake * odds,
+            actual_payout=0.0,
+            profit_loss=0.0,
+            date_placed=datetime.now(),
+            date_settled=None,
+            kickoff=kickoff,
+            notes=f"Added from arbitrage opportunity (Profit: {profit}%)"
+        )
+        db.session.add(bet)
+        bets.append(bet)
+    return bets
+
+def commit_arbitrage_bets(created_bets):
+    """Record the new bets in the stats counters, commit, and reload them with their relationships"""
+    StatsCounter.record_bets(created_bets)
+    
+    # Read the ids before the commit expires the bets, which would reload them one by one
+    db.session.flush()
+    created_ids = [bet.id for bet in created_bets]
+    db.session.commit()
+    
+    # Reload the new bets with their sportsbooks and accounts in one query
+    return Bet.query.options(*Bet.relationship_load_options()).filter(
+        Bet.id.in_(created_ids)
+    ).order_by(Bet.id).all()
+
 @arbitrages_bp.route('/arbitrages/<int:arbitrage_id>/add-to-bets', methods=['POST'])
 def add_arbitrage_to_bets(arbitrage_id):
     """Convert an arbitrage opportunity into individual bets"""
@@ -396,40 +637,10 @@ def add_arbitrage_to_bets(arbitrage_id):
         arbitrage = Arbitrage.query.get_or_404(arbitrage_id)
         data = request.get_json() or {}
         
-        # Parse combination details
         try:
-            combination_details = json.loads(arbitrage.combination_details) if isinstance(arbitrage.combination_details, str) else arbitrage.combination_details
-        except (json.JSONDecodeError, TypeError):
-            return jsonify({'error': 'Invalid combination details format'}), 400
-        
-        if not combination_details:
-            return jsonify({'error': 'No betting combinations found'}), 400
-        
-        # Extract match information
-        first_combo = combination_details[0]
-        home_team = first_combo.get('home_team', 'Team A')
-        away_team = first_combo.get('away_team', 'Team B')
-        league = first_combo.get('league', 'Unknown League')
-        market = first_combo.get('market', 'Unknown Market')
-        
-        # Create event name
-        event_name = f"{home_team} vs {away_team}"
-        
-        # Parse kickoff datetime
-        kickoff = None
-        kickoff_str = arbitrage.kickoff_datetime
-        if kickoff_str:
-            try:
-                # Handle different datetime formats
-                if isinstance(kickoff_str, str):
-                    if 'T' in kickoff_str:
-                        kickoff = datetime.fromisoformat(kickoff_str.replace('Z', '+00:00'))
-                    else:
-                        kickoff = datetime.strptime(kickoff_str, '%Y-%m-%d %H:%M:%S')
-                elif isinstance(kickoff_str, datetime):
-                    kickoff = kickoff_str
-            except (ValueError, TypeError):
-                kickoff = None
+            combination_details = parse_combination_details(arbitrage.combination_details)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         # Get default stake from request or use default
         default_stake = data.get('stake', 100.0)  # Default $100 per bet
@@ -437,52 +648,24 @@ def add_arbitrage_to_bets(arbitrage_id):
         # Get account from request data (optional)
         account = data.get('account')
         
-        created_bets = []
+        try:
+            legs = validate_legs(arbitrage_bet_legs(combination_details, None, default_stake, account))
+        except (ValueError, TypeError, AttributeError) as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Create a bet for each combination in the arbitrage
-        for combo in combination_details:
-            bookmaker = combo.get('bookmaker', 'Unknown')
-            odds = float(combo.get('odds', 1.0))
-            selection = combo.get('name', 'Unknown Selection')
-            
-            # Calculate potential payout
-            potential_payout = default_stake * odds
-            
-            # Resolve sportsbook ID and name
-            sportsbook_id, sportsbook_name = resolve_sportsbook_id(bookmaker)
-            
-            # Resolve account ID and identifier
-            account_id, account_identifier = resolve_account_id(account)
-            
-            # Create the bet
-            bet = Bet(
-                sport='Football',  # Assuming football for now
-                event_name=event_name,
-                bet_type=market,
-                selection=selection,
-                sportsbook_id=sportsbook_id,
-                account_id=account_id,
-                odds=odds,
-                stake=default_stake,
-                status='pending',
-                potential_payout=potential_payout,
-                actual_payout=0.0,
-                profit_loss=0.0,
-                date_placed=datetime.now(),
-                date_settled=None,
-                kickoff=kickoff,
-                notes=f"Added from arbitrage opportunity (Profit: {arbitrage.profit}%)"
-            )
-            
-            db.session.add(bet)
-            created_bets.append(bet)
+        # Resolve the sportsbooks of every leg and the account up front
+        sportsbooks = resolve_sportsbooks(leg[0] for leg in legs)
+        accounts = resolve_accounts([account])
         
-        db.session.commit()
+        created_bets = build_arbitrage_bets(
+            combination_details, legs, arbitrage.kickoff_datetime, arbitrage.profit, sportsbooks, accounts
+        )
+        created_bets = commit_arbitrage_bets(created_bets)
         
         return jsonify({
             'message': f'Successfully created {len(created_bets)} bets from arbitrage opportunity',
             'bets_created': len(created_bets),
-            'total_stake': default_stake * len(created_bets),
+            'total_stake': sum(leg[3] for leg in legs),
             'expected_profit_percentage': arbitrage.profit,
             'bets': [bet.to_dict() for bet in created_bets]
         }), 201
@@ -491,6 +674,15 @@ def add_arbitrage_to_bets(arbitrage_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def parse_kickoff(kickoff_datetime):
+    """Kickoff sent with arbitrage data; a missing or unparseable one is left out"""
+    if not kickoff_datetime:
+        return None
+    try:
+        return parse_datetime(kickoff_datetime)
+    except ValueError:
+        return None
+
 @arbitrages_bp.route('/arbitrages/add-to-bets', methods=['POST'])
 def add_arbitrage_to_bets_by_data():
     """Convert arbitrage opportunity data into individual bets with custom stakes and accounts"""
@@ -500,114 +692,162 @@ def add_arbitrage_to_bets_by_data():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
         
-        # Extract arbitrage data from request
-        combination_details = data.get('combination_details', [])
-        match_signature = data.get('match_signature', '')
+        try:
+            combination_details = parse_combination_details(data.get('combination_details'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
         profit = data.get('profit', 0)
-        kickoff_datetime = data.get('kickoff_datetime')
         
-        # Handle both old stakes format (dict) and new format (list of bet objects)
-        stakes_data = data.get('stakes', {})
+        # Get default stake and account from request or use defaults
+        default_stake = data.get('stake', 100.0)  # Default $100 per bet
+        default_account = data.get('account')
         
-        if not combination_details:
-            return jsonify({'error': 'No betting combinations found'}), 400
+        # Handle both old stakes format (dict) and new format (list of bet objects)
+        try:
+            legs = validate_legs(arbitrage_bet_legs(combination_details, data.get('stakes', {}), default_stake, default_account))
+        except (ValueError, TypeError, AttributeError) as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Extract match information
-        first_combo = combination_details[0]
-        home_team = first_combo.get('home_team', 'Team A')
-        away_team = first_combo.get('away_team', 'Team B')
-        league = first_combo.get('league', 'Unknown League')
-        market = first_combo.get('market', 'Unknown Market')
+        # Resolve the sportsbooks and accounts of every leg up front
+        sportsbooks = resolve_sportsbooks(leg[0] for leg in legs)
+        accounts = resolve_accounts(leg[4] for leg in legs)
         
-        # Create event name
-        event_name = f"{home_team} vs {away_team}"
+        created_bets = build_arbitrage_bets(
+            combination_details, legs, parse_kickoff(data.get('kickoff_datetime')), profit, sportsbooks, accounts
+        )
+        created_bets = commit_arbitrage_bets(created_bets)
         
-        # Parse kickoff datetime
-        kickoff = None
-        if kickoff_datetime:
+        return jsonify({
+            'message': f'Successfully created {len(created_bets)} bets from arbitrage opportunity',
+            'bets_created': len(created_bets),
+            'total_stake': sum(leg[3] for leg in legs),
+            'expected_profit_percentage': profit,
+            'bets': [bet.to_dict() for bet in created_bets]
+        }), 201
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+def validate_stake(stake, leg):
+    """The stake of a leg as a positive, finite float. Raises ValueError otherwise."""
+    error = ValueError(f'stake of leg {leg} must be a positive number')
+    if isinstance(stake, bool):
+        raise error
+    try:
+        stake = float(stake)
+    except (TypeError, ValueError):
+        raise error
+    if not math.isfinite(stake) or stake <= 0:
+        raise error
+    return stake
+
+def validate_account(account, leg):
+    """The account of a leg: None, an account id or an identifier. Raises ValueError otherwise."""
+    if account is None or (isinstance(account, (str, int)) and not isinstance(account, bool)):
+        return account
+    raise ValueError(f'account of leg {leg} must be an account id or identifier')
+
+def validate_legs(legs):
+    """arbitrage_bet_legs results with every stake and account validated. Raises ValueError if any is invalid."""
+    return [
+        (bookmaker, odds, selection, validate_stake(stake, leg), validate_account(account, leg))
+        for leg, (bookmaker, odds, selection, stake, account) in enumerate(legs)
+    ]
+
+@arbitrages_bp.route('/arbitrages/add-to-bets/batch', methods=['POST'])
+def add_arbitrages_to_bets_batch():
+    """
+    Convert many arbitrages into bets in one transaction. The body is a JSON
+    array, or an object with an arbitrages array plus default stake and account.
+    Each item is a stored arbitrage's id (a number or {id, stake?, account?, stakes?})
+    or arbitrage data as sent to /arbitrages/add-to-bets. Sportsbooks and accounts
+    of every leg are resolved together, and nothing is created if any item is invalid.
+    """
+    try:
+        data = request.get_json(silent=True)
+        defaults = data if isinstance(data, dict) else {}
+        items = data.get('arbitrages') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Request body must be a JSON array of arbitrages or an object with an arbitrages array'}), 400
+        
+        default_stake = defaults.get('stake', 100.0)  # Default $100 per bet
+        default_account = defaults.get('account')
+        
+        # Stored arbitrages are loaded in one query
+        item_ids = [item.get('id') if isinstance(item, dict) else item for item in items]
+        wanted_ids = {
+            arbitrage_id for item, arbitrage_id in zip(items, item_ids)
+            if not (isinstance(item, dict) and 'combination_details' in item) and type(arbitrage_id) is int
+        }
+        stored = {arbitrage.id: arbitrage for arbitrage in Arbitrage.query.filter(Arbitrage.id.in_(wanted_ids))} if wanted_ids else {}
+        
+        # Parse every arbitrage once, collecting its legs and kickoff
+        plans = []
+        errors = []
+        for index, (item, arbitrage_id) in enumerate(zip(items, item_ids)):
+            options = item if isinstance(item, dict) else {}
             try:
-                # Handle different datetime formats
-                if isinstance(kickoff_datetime, str):
-                    if 'T' in kickoff_datetime:
-                        kickoff = datetime.fromisoformat(kickoff_datetime.replace('Z', '+00:00'))
-                    else:
-                        kickoff = datetime.strptime(kickoff_datetime, '%Y-%m-%d %H:%M:%S')
-                elif isinstance(kickoff_datetime, datetime):
-                    kickoff = kickoff_datetime
-            except (ValueError, TypeError):
-                kickoff = None
+                if 'combination_details' in options:
+                    arbitrage_id = None
+                    combination_details = parse_combination_details(options['combination_details'])
+                    kickoff = parse_kickoff(options.get('kickoff_datetime'))
+                    profit = options.get('profit', 0)
+                elif type(arbitrage_id) is int:  # Not a bool, which isinstance would accept
+                    arbitrage = stored.get(arbitrage_id)
+                    if arbitrage is None:
+                        raise ValueError('Arbitrage not found')
+                    combination_details = parse_combination_details(arbitrage.combination_details)
+                    kickoff = arbitrage.kickoff_datetime
+                    profit = arbitrage.profit
+                else:
+                    raise ValueError('Item must be an arbitrage id or arbitrage data with combination_details')
+                
+                legs = validate_legs(arbitrage_bet_legs(
+                    combination_details, options.get('stakes'),
+                    options.get('stake', default_stake), options.get('account', default_account)
+                ))
+            except (ValueError, TypeError, AttributeError) as e:
+                errors.append({'index': index, 'id': arbitrage_id, 'error': str(e)})
+                continue
+            
+            plans.append((index, arbitrage_id, combination_details, legs, kickoff, profit))
         
-        # Get default stake from request or use default
-        default_stake = data.get('stake', 100.0)  # Default $100 per bet
+        if errors:
+            return jsonify({'error': 'No bets were created because some arbitrages are invalid', 'errors': errors}), 400
         
-        # Get default account from request data (optional)
-        default_account = data.get('account')
+        # Resolve the sportsbooks and accounts of every leg of every arbitrage up front
+        all_legs = [leg for plan in plans for leg in plan[3]]
+        sportsbooks = resolve_sportsbooks(leg[0] for leg in all_legs)
+        accounts = resolve_accounts(leg[4] for leg in all_legs)
         
         created_bets = []
-        total_stake = 0
-        
-        # Create a bet for each combination in the arbitrage
-        for i, combo in enumerate(combination_details):
-            bookmaker = combo.get('bookmaker', 'Unknown')
-            odds = float(combo.get('odds', 1.0))
-            selection = combo.get('name', 'Unknown Selection')
-            
-            # Handle stakes data - check if it's the new format (list) or old format (dict)
-            if isinstance(stakes_data, list) and i < len(stakes_data):
-                # New format: stakes_data is a list of bet objects with stake and account
-                bet_data = stakes_data[i]
-                stake = float(bet_data.get('stake', default_stake))
-                account = bet_data.get('account', default_account)
-            elif isinstance(stakes_data, dict):
-                # Old format: stakes_data is a dictionary with index as key
-                stake = float(stakes_data.get(str(i), default_stake))
-                account = default_account
-            else:
-                # Fallback to defaults
-                stake = default_stake
-                account = default_account
-            
-            total_stake += stake
-            
-            # Calculate potential payout
-            potential_payout = stake * odds
-            
-            # Resolve sportsbook ID and name
-            sportsbook_id, sportsbook_name = resolve_sportsbook_id(bookmaker)
-            
-            # Resolve account ID and identifier
-            account_id, account_identifier = resolve_account_id(account)
-            
-            # Create the bet
-            bet = Bet(
-                sport='Football',  # Assuming football for now
-                event_name=event_name,
-                bet_type=market,
-                selection=selection,
-                sportsbook_id=sportsbook_id,
-                account_id=account_id,
-                odds=odds,
-                stake=stake,
-                status='pending',
-                potential_payout=potential_payout,
-                actual_payout=0.0,
-                profit_loss=0.0,
-                date_placed=datetime.now(),
-                date_settled=None,
-                kickoff=kickoff,
-                notes=f"Added from arbitrage opportunity (Profit: {profit}%)"
-            )
-            
-            db.session.add(bet)
-            created_bets.append(bet)
-        
-        db.session.commit()
+        results = []
+        for index, arbitrage_id, combination_details, legs, kickoff, profit in plans:
+            bets = build_arbitrage_bets(combination_details, legs, kickoff, profit, sportsbooks, accounts)
+            created_bets.extend(bets)
+            results.append(({
+                'index': index,
+                'id': arbitrage_id,
+                'bets_created': len(bets),
+                'total_stake': sum(leg[3] for leg in legs),
+                'expected_profit_percentage': profit
+            }, bets))
+        
+        created_bets = commit_arbitrage_bets(created_bets)
+        
+        # The reload refreshed these same bet objects, so reading their ids costs no queries
+        for result, bets in results:
+            result['bet_ids'] = [bet.id for bet in bets]
+        results = [result for result, bets in results]
         
         return jsonify({
-            'message': f'Successfully created {len(created_bets)} bets from arbitrage opportunity',
+            'message': f'Successfully created {len(created_bets)} bets from {len(results)} arbitrage opportunities',
+            'arbitrages_processed': len(results),
             'bets_created': len(created_bets),
-            'total_stake': total_stake,
-            'expected_profit_percentage': profit,
+            'total_stake': sum(result['total_stake'] for result in results),
+            'results': results,
             'bets': [bet.to_dict() for bet in created_bets]
         }), 201
     
@@ -3,61 +3,24 @@ from app import db
 from app.models.bet import Bet
 from app.models.account import Account
 from app.models.sportsbook import Sportsbook
+from app.models.stats_counter import StatsCounter
+from app.datetime_utils import parse_datetime, parse_local_datetime
+from app.pagination import keyset_paginate
+from app.resolvers import resolve_account_id, resolve_accounts, resolve_sportsbook_id, resolve_sportsbooks
+from app.bulk import iter_bulk_payload
+from app.settlement import SETTLEMENT_RULES, SETTLEMENT_STATUSES, settle_bet, settle_bets
+from app.cache import cached_response, conditional_response, invalidate_on_write
 from datetime import datetime
-from sqlalchemy import desc, asc
-from sqlalchemy import desc, case
+from sqlalchemy import asc, case, desc, func
+from types import SimpleNamespace
 
 bets_bp = Blueprint('bets', __name__)
 
-def resolve_sportsbook_id(sportsbook_input):
-    """
-    Resolve sportsbook ID from either ID or name.
-    Returns (sportsbook_id, sportsbook_name) tuple or (None, None) if not found.
-    Creates sportsbook if it doesn't exist.
-    """
-    if not sportsbook_input:
-        return None, None
-    
-    # If it's a number, treat it as ID
-    if str(sportsbook_input).isdigit():
-        sportsbook = Sportsbook.query.get(int(sportsbook_input))
-        if sportsbook:
-            return sportsbook.id, sportsbook.name
-    
-    # Otherwise, treat it as name and try to find it
-    sportsbook = Sportsbook.get_by_name(str(sportsbook_input))
-    if sportsbook:
-        return sportsbook.id, sportsbook.name
-    
-    # If not found, create new sportsbook
-    sportsbook = Sportsbook.create_if_not_exists(str(sportsbook_input))
-    db.session.add(sportsbook)
-    db.session.flush()  # Get the ID without committing
-    return sportsbook.id, sportsbook.name
-
-def resolve_account_id(account_input):
-    """
-    Resolve account ID from either ID or identifier.
-    Returns (account_id, account_identifier) tuple or (None, None) if not found.
-    """
-    if not account_input:
-        return None, None
-    
-    # If it's a number, treat it as ID
-    if str(account_input).isdigit():
-        account = Account.query.get(int(account_input))
-        if account:
-            return account.id, account.account_identifier
-    
-    # Otherwise, treat it as identifier and try to find it
-    account = Account.query.filter_by(account_identifier=str(account_input)).first()
-    if account:
-        return account.id, account.account_identifier
-    
-    # If not found, return None (don't auto-create accounts)
-    return None, None
+# Bet writes can create sportsbooks and accounts by name
+invalidate_on_write(bets_bp, 'bets', 'accounts', 'sportsbooks')
 
 @bets_bp.route('/bets', methods=['GET'])
+@conditional_response(Bet, Sportsbook, Account)
 def get_bets():
     """Get all bets with optional filtering and pagination"""
     status = request.args.get('status')
@@ -66,10 +29,10 @@ def get_bets():
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
     
-    # Limit per_page to prevent abuse
-    per_page = min(per_page, 100)
+    # Keep per_page between 1 and 100
+    per_page = max(1, min(per_page, 100))
     
-    query = Bet.query
+    query = Bet.query.options(*Bet.relationship_load_options())
     
     if status:
         query = query.filter(Bet.status == status)
@@ -79,6 +42,27 @@ def get_bets():
         # Filter by sportsbook name through the relationship
         query = query.join(Sportsbook).filter(Sportsbook.name == sportsbook)
     
+    if 'cursor' in request.args:
+        # Cursor mode: newest first by (date_placed, id), an index range scan at any depth
+        try:
+            bets, next_cursor = keyset_paginate(query, [Bet.date_placed, Bet.id], request.args.get('cursor'), per_page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        pagination = {
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }
+        # The exact total costs a COUNT(*) over the filtered bets, so it is opt-in
+        if request.args.get('include_total', 'false').lower() in ['true', '1', 'yes']:
+            pagination['total'] = query.count()
+        
+        return jsonify({
+            'bets': [bet.to_dict() for bet in bets],
+            'pagination': pagination
+        })
+    
     # Order by: pending bets first (status='pending' gets priority 0, others get priority 1)
     # Then by date_placed descending (newest first)
     query = query.order_by(
@@ -109,22 +93,22 @@ def get_bets():
     })
 
 @bets_bp.route('/bets/filters', methods=['GET'])
+@conditional_response(Bet, Sportsbook)
+@cached_response('bets')
 def get_filter_options():
     """Get all available filter options (sports and sportsbooks)"""
-    sports = db.session.query(Bet.sport).distinct().filter(Bet.sport.isnot(None)).all()
-    
-    # Get sportsbooks from bets that have sportsbook relationships
-    sportsbook_ids = db.session.query(Bet.sportsbook_id).distinct().filter(Bet.sportsbook_id.isnot(None)).all()
-    sportsbooks = []
-    for sportsbook_id_tuple in sportsbook_ids:
-        sportsbook = Sportsbook.query.get(sportsbook_id_tuple[0])
-        if sportsbook:
-            sportsbooks.append(sportsbook.name)
-    
-    return jsonify({
-        'sports': [sport[0] for sport in sports if sport[0]],
-        'sportsbooks': sportsbooks
-    })
+    try:
+        # Every (sport, sportsbook) pair in use, read from the (sport, sportsbook_id) index in one query
+        pairs = db.session.query(Bet.sport, Sportsbook.name).outerjoin(
+            Sportsbook, Bet.sportsbook_id == Sportsbook.id
+        ).distinct().all()
+        
+        return jsonify({
+            'sports': sorted({sport for sport, _ in pairs if sport}),
+            'sportsbooks': sorted({name for _, name in pairs if name})
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 @bets_bp.route('/bets', methods=['POST'])
 def create_bet():
@@ -139,7 +123,7 @@ def create_bet():
         kickoff = None
         if 'kickoff' in data and data['kickoff']:
             try:
-                kickoff = datetime.fromisoformat(data['kickoff'].replace('Z', '+00:00'))
+                kickoff = parse_datetime(data['kickoff'])
             except ValueError:
                 return jsonify({'error': 'Invalid kickoff datetime format'}), 400
         
@@ -164,17 +148,243 @@ def create_bet():
         )
         
         db.session.add(bet)
+        db.session.flush()  # Apply column defaults before counting the bet
+        StatsCounter.record_bets([bet])
         db.session.commit()
         
         return jsonify(bet.to_dict()), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
+def build_bet_row(data, now):
+    """
+    Validate one bet payload of a bulk request and build its column values,
+    leaving the sportsbook and account names to be resolved for the whole batch.
+    Raises ValueError with a message describing the problem.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Bet must be a JSON object')
+    
+    for field in ['sport', 'event_name', 'bet_type', 'selection', 'odds', 'stake']:
+        if data.get(field) in (None, ''):
+            raise ValueError(f'{field} is required')
+    
+    try:
+        odds = float(data['odds'])
+        stake = float(data['stake'])
+    except (ValueError, TypeError):
+        raise ValueError('Invalid odds or stake format')
+    
+    kickoff = None
+    if data.get('kickoff'):
+        try:
+            kickoff = parse_datetime(data['kickoff'])
+        except ValueError:
+            raise ValueError('Invalid kickoff datetime format')
+    
+    for field in ['sportsbook', 'account']:
+        if not isinstance(data.get(field), (str, int, type(None))):
+            raise ValueError(f'{field} must be a name or an id')
+    
+    # Imported bets may carry the time they were placed, kept in local time like the default
+    date_placed = now
+    if data.get('date_placed'):
+        try:
+            date_placed = parse_local_datetime(data['date_placed'])
+        except ValueError:
+            raise ValueError('Invalid date_placed format')
+    
+    return {
+        'sport': data['sport'],
+        'event_name': data['event_name'],
+        'bet_type': data['bet_type'],
+        'selection': data['selection'],
+        'sportsbook': data.get('sportsbook'),
+        'account': data.get('account'),
+        'odds': odds,
+        'stake': stake,
+        'status': 'pending',
+        'potential_payout': stake * odds,
+        'actual_payout': 0.0,
+        'profit_loss': 0.0,
+        'date_placed': date_placed,
+        'kickoff': kickoff,
+        'notes': data.get('notes', '')
+    }
+
+@bets_bp.route('/bets/bulk', methods=['POST'])
+def bulk_create_bets():
+    """
+    Create many bets from a JSON array or NDJSON body in one transaction. Rows
+    that fail validation are reported and skipped; the rest are inserted together.
+    """
+    try:
+        now = datetime.now()
+        results = []
+        rows = []
+        
+        try:
+            for index, (data, error) in enumerate(iter_bulk_payload()):
+                if error is None:
+                    try:
+                        row = build_bet_row(data, now)
+                    except ValueError as e:
+                        error = str(e)
+                
+                if error is not None:
+                    results.append({'index': index, 'status': 'error', 'error': error})
+                    continue
+                
+                results.append({'index': index, 'status': 'created'})
+                rows.append(row)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        bet_ids = []
+        if rows:
+            # Every sportsbook and account of the batch in one lookup each
+            sportsbook_inputs = [row.pop('sportsbook') for row in rows]
+            account_inputs = [row.pop('account') for row in rows]
+            sportsbooks = resolve_sportsbooks(sportsbook_inputs)
+            accounts = resolve_accounts(account_inputs)
+            for row, sportsbook_input, account_input in zip(rows, sportsbook_inputs, account_inputs):
+                row['sportsbook_id'] = sportsbooks[sportsbook_input][0]
+                row['account_id'] = accounts[account_input][0]
+            
+            # One multi-row INSERT per batch of rows, returning the ids in payload order
+            table = Bet.__table__
+            bet_ids = db.session.execute(
+                table.insert().returning(table.c.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            
+            StatsCounter.record_bets(SimpleNamespace(**row) for row in rows)
+        
+        db.session.commit()
+        
+        created_ids = iter(bet_ids)
+        for result in results:
+            if result['status'] == 'created':
+                result['id'] = next(created_ids)
+        
+        error_count = len(results) - len(bet_ids)
+        return jsonify({
+            'message': f'Successfully created {len(bet_ids)} bets',
+            'created_count': len(bet_ids),
+            'error_count': error_count,
+            'results': results
+        }), 201 if bet_ids or not error_count else 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+SETTLE_FILTER_FIELDS = ['sport', 'event_name', 'bet_type', 'selection', 'sportsbook', 'account']
+
+def bet_filter_query(filters):
+    """
+    Query of the bets matching a settlement filter: exact sport, event_name,
+    bet_type, selection, sportsbook name and account identifier, and status
+    (default 'pending'). Raises ValueError for unknown or missing fields.
+    """
+    unknown = set(filters) - set(SETTLE_FILTER_FIELDS) - {'status'}
+    if unknown:
+        raise ValueError(f"Unknown filter fields: {', '.join(sorted(unknown))}")
+    # A filter on status alone would settle every pending bet
+    if not any(filters.get(field) for field in SETTLE_FILTER_FIELDS):
+        raise ValueError(f"filter needs at least one of: {', '.join(SETTLE_FILTER_FIELDS)}")
+    
+    query = Bet.query.filter(Bet.status == filters.get('status', 'pending'))
+    for field in ['sport', 'event_name', 'bet_type', 'selection']:
+        if filters.get(field):
+            query = query.filter(getattr(Bet, field) == filters[field])
+    if filters.get('sportsbook'):
+        query = query.join(Sportsbook, Bet.sportsbook_id == Sportsbook.id).filter(Sportsbook.name == filters['sportsbook'])
+    if filters.get('account'):
+        query = query.join(Account, Bet.account_id == Account.id).filter(Account.account_identifier == filters['account'])
+    return query
+
+def parse_settlements(data):
+    """
+    Parse a settlement request: a list of {id, status, actual_payout?} objects, or
+    {filter, status, actual_payout?} settling every bet matching filter (by default
+    only pending ones). Returns (settlements, results): a {bet_id: (status, actual_payout)}
+    dict and a per-row result list with the rows rejected so far.
+    Raises ValueError if the request as a whole is invalid.
+    """
+    def parse_settlement(item):
+        if not isinstance(item, dict):
+            raise ValueError('Settlement must be a JSON object')
+        if item.get('status') not in SETTLEMENT_RULES:
+            raise ValueError(f"status must be one of: {', '.join(SETTLEMENT_STATUSES)}")
+        actual_payout = item.get('actual_payout')
+        if actual_payout is not None:
+            try:
+                actual_payout = float(actual_payout)
+            except (ValueError, TypeError):
+                raise ValueError('Invalid actual_payout format')
+        return item['status'], actual_payout
+    
+    if isinstance(data, list):
+        settlements = {}
+        results = []
+        for index, item in enumerate(data):
+            bet_id = item.get('id') if isinstance(item, dict) else None
+            try:
+                status, actual_payout = parse_settlement(item)
+                if not str(bet_id).isdigit():
+                    raise ValueError('id must be a bet id')
+            except ValueError as e:
+                results.append({'index': index, 'id': bet_id, 'status': 'error', 'error': str(e)})
+                continue
+            
+            bet_id = int(bet_id)
+            settlements[bet_id] = (status, actual_payout)
+            results.append({'index': index, 'id': bet_id, 'status': 'settled'})
+        return settlements, results
+    
+    if isinstance(data, dict) and isinstance(data.get('filter'), dict):
+        status, actual_payout = parse_settlement(data)
+        query = bet_filter_query(data['filter'])
+        bet_ids = [bet_id for bet_id, in query.with_entities(Bet.id)]
+        results = [{'index': index, 'id': bet_id, 'status': 'settled'} for index, bet_id in enumerate(bet_ids)]
+        return {bet_id: (status, actual_payout) for bet_id in bet_ids}, results
+    
+    raise ValueError('Request body must be a JSON array of settlements or an object with filter and status')
+
+@bets_bp.route('/bets/settle', methods=['POST'])
+def settle_many_bets():
+    """Settle many bets in one transaction with set-based updates"""
+    try:
+        try:
+            settlements, results = parse_settlements(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        settled_ids = set(settle_bets(settlements)) if settlements else set()
+        db.session.commit()
+        
+        for result in results:
+            if result['status'] == 'settled' and result['id'] not in settled_ids:
+                result.update(status='error', error='Bet not found')
+        
+        error_count = sum(1 for result in results if result['status'] == 'error')
+        return jsonify({
+            'message': f'Successfully settled {len(settled_ids)} bets',
+            'settled_count': len(settled_ids),
+            'error_count': error_count,
+            'results': results
+        }), 200 if settled_ids or not error_count else 400
+    
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @bets_bp.route('/bets/<int:bet_id>', methods=['PUT'])
 def update_bet(bet_id):
     """Update a bet (usually to mark as won/lost)"""
     bet = Bet.query.get_or_404(bet_id)
     data = request.get_json()
+    previous_entry = StatsCounter.bet_entry(bet)
     
     try:
         # Handle sportsbook and account updates with ID resolution
@@ -195,7 +405,7 @@ def update_bet(bet_id):
         if 'kickoff' in data:
             if data['kickoff']:
                 try:
-                    bet.kickoff = datetime.fromisoformat(data['kickoff'].replace('Z', '+00:00'))
+                    bet.kickoff = parse_datetime(data['kickoff'])
                 except ValueError:
                     return jsonify({'error': 'Invalid kickoff datetime format'}), 400
             else:
@@ -203,33 +413,18 @@ def update_bet(bet_id):
         
         # Handle status change
         if 'status' in data:
-            bet.status = data['status']
-            
-            if data['status'] == 'won':
-                bet.actual_payout = data.get('actual_payout', bet.potential_payout)
-                bet.profit_loss = bet.actual_payout - bet.stake
-                bet.date_settled = datetime.now()
-            elif data['status'] == 'half_won':
-                bet.actual_payout = data.get('actual_payout', (bet.potential_payout + bet.stake) / 2)
-                bet.profit_loss = bet.actual_payout - bet.stake
-                bet.date_settled = datetime.now()
-            elif data['status'] == 'lost':
-                bet.actual_payout = 0
-                bet.profit_loss = -bet.stake
-                bet.date_settled = datetime.now()
-            elif data['status'] == 'half_lost':
-                bet.actual_payout = bet.stake / 2  # Get back half the stake
-                bet.profit_loss = bet.actual_payout - bet.stake  # This will be negative (loss)
-                bet.date_settled = datetime.now()
-            elif data['status'] == 'void':
-                bet.actual_payout = bet.stake  # Stake returned
-                bet.profit_loss = 0
-                bet.date_settled = datetime.now()
+            if data['status'] in SETTLEMENT_RULES:
+                settle_bet(bet, data['status'], data.get('actual_payout'))
+            else:
+                bet.status = data['status']
         
         # Recalculate potential payout if odds or stake changed
         if 'odds' in data or 'stake' in data:
             bet.potential_payout = bet.stake * bet.odds
         
+        # Move the bet between counters in the same transaction
+        StatsCounter.apply(added=[StatsCounter.bet_entry(bet)], removed=[previous_entry])
+        
         db.session.commit()
         return jsonify(bet.to_dict())
     except Exception as e:
@@ -241,6 +436,7 @@ def delete_bet(bet_id):
     bet = Bet.query.get_or_404(bet_id)
     
     try:
+        StatsCounter.record_bets([bet], sign=-1)
         db.session.delete(bet)
         db.session.commit()
         return jsonify({'message': 'Bet deleted successfully'})
@@ -248,30 +444,58 @@ def delete_bet(bet_id):
         return jsonify({'error': str(e)}), 400
 
 @bets_bp.route('/stats', methods=['GET'])
+@conditional_response(Bet, Sportsbook, Account, StatsCounter)
+@cached_response('bets')
 def get_stats():
-    """Get betting statistics"""
-    all_bets = Bet.query.all()
-    settled_bets = Bet.query.filter(Bet.status.in_(['won', 'half_won', 'lost', 'half_lost', 'void'])).all()
-    won_bets = Bet.query.filter(Bet.status.in_(['won', 'half_won'])).all()
-    lost_bets = Bet.query.filter(Bet.status.in_(['lost', 'half_lost'])).all()
+    """Get betting statistics, optionally for a date range, account or sportsbook"""
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    account = request.args.get('account')
+    sportsbook = request.args.get('sportsbook')
+    
+    # One aggregate row per (sport, status) instead of loading every bet
+    query = db.session.query(
+        Bet.sport,
+        Bet.status,
+        func.count(Bet.id),
+        func.coalesce(func.sum(Bet.stake), 0.0),
+        func.coalesce(func.sum(Bet.profit_loss), 0.0),
+        func.coalesce(func.sum(Bet.potential_payout), 0.0)
+    )
+    
+    # date_placed is stored in local time
+    try:
+        if start_date:
+            query = query.filter(Bet.date_placed >= parse_local_datetime(start_date))
+        if end_date:
+            query = query.filter(Bet.date_placed <= parse_local_datetime(end_date))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    total_bets = len(all_bets)
-    total_settled = len(settled_bets)
-    total_won = len(won_bets)
-    total_lost = len(lost_bets)
+    if account:
+        query = query.join(Account, Bet.account_id == Account.id).filter(Account.account_identifier == account)
+    if sportsbook:
+        query = query.join(Sportsbook, Bet.sportsbook_id == Sportsbook.id).filter(Sportsbook.name == sportsbook)
     
-    total_staked = sum(bet.stake for bet in all_bets)
-    total_profit_loss = sum(bet.profit_loss for bet in settled_bets)
-    total_potential_winnings = sum(bet.potential_payout for bet in all_bets if bet.status == 'pending')
+    if start_date or end_date:
+        rows = query.group_by(Bet.sport, Bet.status).all()
+    else:
+        # The running counters have the same totals without touching the bet table
+        rows = StatsCounter.bet_rows(account=account, sportsbook=sportsbook)
     
-    win_rate = (total_won / total_settled * 100) if total_settled > 0 else 0
-    roi = (total_profit_loss / total_staked * 100) if total_staked > 0 else 0
+    total_bets = 0
+    total_settled = 0
+    total_won = 0
+    total_lost = 0
+    total_staked = 0
+    total_profit_loss = 0
+    total_potential_winnings = 0
     
     # Get sports breakdown
     sports_stats = {}
-    for bet in all_bets:
-        if bet.sport not in sports_stats:
-            sports_stats[bet.sport] = {
+    for sport, status, count, staked, profit_loss, potential_payout in rows:
+        if sport not in sports_stats:
+            sports_stats[sport] = {
                 'total_bets': 0,
                 'total_staked': 0,
                 'profit_loss': 0,
@@ -279,14 +503,28 @@ def get_stats():
                 'lost': 0
             }
         
-        sports_stats[bet.sport]['total_bets'] += 1
-        sports_stats[bet.sport]['total_staked'] += bet.stake
-        sports_stats[bet.sport]['profit_loss'] += bet.profit_loss
+        sports_stats[sport]['total_bets'] += count
+        sports_stats[sport]['total_staked'] += staked
+        sports_stats[sport]['profit_loss'] += profit_loss
         
-        if bet.status in ['won', 'half_won']:
-            sports_stats[bet.sport]['won'] += 1
-        elif bet.status in ['lost', 'half_lost']:
-            sports_stats[bet.sport]['lost'] += 1
+        total_bets += count
+        total_staked += staked
+        
+        if status in ['won', 'half_won', 'lost', 'half_lost', 'void']:
+            total_settled += count
+            total_profit_loss += profit_loss
+        
+        if status in ['won', 'half_won']:
+            total_won += count
+            sports_stats[sport]['won'] += count
+        elif status in ['lost', 'half_lost']:
+            total_lost += count
+            sports_stats[sport]['lost'] += count
+        elif status == 'pending':
+            total_potential_winnings += potential_payout
+    
+    win_rate = (total_won / total_settled * 100) if total_settled > 0 else 0
+    roi = (total_profit_loss / total_staked * 100) if total_staked > 0 else 0
     
     return jsonify({
         'total_bets': total_bets,
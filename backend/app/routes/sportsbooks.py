@@ -3,9 +3,13 @@ from app import db
 from app.models.sportsbook import Sportsbook
 from datetime import datetime
 from sqlalchemy import desc, asc
+from app.cache import cached_response, conditional_response, invalidate_on_write
 
 sportsbooks_bp = Blueprint('sportsbooks', __name__)
 
+# Bet stats and filters include sportsbook names
+invalidate_on_write(sportsbooks_bp, 'sportsbooks', 'bets', 'transactions')
+
 @sportsbooks_bp.route('/sportsbooks', methods=['GET'])
 def get_sportsbooks():
     """Get all sportsbooks with optional filtering"""
@@ -63,6 +67,8 @@ def get_sportsbooks():
         return jsonify({'error': str(e)}), 500
 
 @sportsbooks_bp.route('/sportsbooks/active', methods=['GET'])
+@conditional_response(Sportsbook)
+@cached_response('sportsbooks')
 def get_active_sportsbooks():
     """Get all active sportsbooks for dropdowns"""
     try:
@@ -179,6 +185,10 @@ def delete_sportsbook(sportsbook_id):
                          'Consider deactivating it instead.'
             }), 400
         
+        # Its transactions are left without a sportsbook, so are their counters
+        from app.models.stats_counter import StatsCounter
+        StatsCounter.detach_sportsbook(sportsbook.id)
+        
         db.session.delete(sportsbook)
         db.session.commit()
         
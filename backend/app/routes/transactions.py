@@ -3,60 +3,20 @@ from app import db
 from app.models.transaction import Transaction
 from app.models.account import Account
 from app.models.sportsbook import Sportsbook
+from app.models.stats_counter import StatsCounter
+from app.pagination import keyset_paginate
+from app.resolvers import resolve_account_id, resolve_sportsbook_id
+from app.cache import conditional_response, invalidate_on_write
+from sqlalchemy import func
 from datetime import datetime
 
 transactions_bp = Blueprint('transactions', __name__)
 
-def resolve_sportsbook_id(sportsbook_input):
-    """
-    Resolve sportsbook ID from either ID or name.
-    Returns (sportsbook_id, sportsbook_name) tuple or (None, None) if not found.
-    Creates sportsbook if it doesn't exist.
-    """
-    if not sportsbook_input:
-        return None, None
-    
-    # If it's a number, treat it as ID
-    if str(sportsbook_input).isdigit():
-        sportsbook = Sportsbook.query.get(int(sportsbook_input))
-        if sportsbook:
-            return sportsbook.id, sportsbook.name
-    
-    # Otherwise, treat it as name and try to find it
-    sportsbook = Sportsbook.get_by_name(str(sportsbook_input))
-    if sportsbook:
-        return sportsbook.id, sportsbook.name
-    
-    # If not found, create new sportsbook
-    sportsbook = Sportsbook.create_if_not_exists(str(sportsbook_input))
-    db.session.add(sportsbook)
-    db.session.flush()  # Get the ID without committing
-    return sportsbook.id, sportsbook.name
-
-def resolve_account_id(account_input):
-    """
-    Resolve account ID from either ID or identifier.
-    Returns (account_id, account_identifier) tuple or (None, None) if not found.
-    """
-    if not account_input:
-        return None, None
-    
-    # If it's a number, treat it as ID
-    if str(account_input).isdigit():
-        account = Account.query.get(int(account_input))
-        if account:
-            return account.id, account.account_identifier
-    
-    # Otherwise, treat it as identifier and try to find it
-    account = Account.query.filter_by(account_identifier=str(account_input)).first()
-    if account:
-        return account.id, account.account_identifier
-    
-    # If not found, return None (don't auto-create accounts)
-    return None, None
-    return None
+# Transaction writes can create sportsbooks and accounts by name
+invalidate_on_write(transactions_bp, 'transactions', 'accounts', 'sportsbooks')
 
 @transactions_bp.route('/transactions', methods=['GET'])
+@conditional_response(Transaction, Sportsbook, Account)
 def get_transactions():
     """Get all transactions with optional filtering and pagination"""
     try:
@@ -69,11 +29,11 @@ def get_transactions():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
         
-        # Limit per_page to prevent abuse
-        per_page = min(per_page, 100)
+        # Keep per_page between 1 and 100
+        per_page = max(1, min(per_page, 100))
         
         # Build query
-        query = Transaction.query
+        query = Transaction.query.options(*Transaction.relationship_load_options())
         
         if transaction_type:
             query = query.filter(Transaction.transaction_type == transaction_type)
@@ -93,6 +53,29 @@ def get_transactions():
             end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
             query = query.filter(Transaction.date_created <= end)
         
+        if 'cursor' in request.args:
+            # Cursor mode: newest first by (date_created, id), an index range scan at any depth
+            try:
+                transactions, next_cursor = keyset_paginate(
+                    query, [Transaction.date_created, Transaction.id], request.args.get('cursor'), per_page
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            pagination = {
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_next': next_cursor is not None
+            }
+            # The exact total costs a COUNT(*) over the filtered transactions, so it is opt-in
+            if request.args.get('include_total', 'false').lower() in ['true', '1', 'yes']:
+                pagination['total'] = query.count()
+            
+            return jsonify({
+                'transactions': [transaction.to_dict() for transaction in transactions],
+                'pagination': pagination
+            })
+        
         # Order by date_created descending
         query = query.order_by(Transaction.date_created.desc())
         
@@ -168,6 +151,8 @@ def create_transaction():
         )
         
         db.session.add(transaction)
+        db.session.flush()  # Apply column defaults before counting the transaction
+        StatsCounter.record_transactions([transaction])
         db.session.commit()
         
         return jsonify(transaction.to_dict()), 201
@@ -182,6 +167,7 @@ def update_transaction(transaction_id):
     try:
         transaction = Transaction.query.get_or_404(transaction_id)
         data = request.get_json()
+        previous_entry = StatsCounter.transaction_entry(transaction)
         
         # Update fields if provided
         if 'transaction_type' in data:
@@ -232,6 +218,9 @@ def update_transaction(transaction_id):
         if 'notes' in data:
             transaction.notes = data['notes']
         
+        # Move the transaction between counters in the same transaction
+        StatsCounter.apply(added=[StatsCounter.transaction_entry(transaction)], removed=[previous_entry])
+        
         db.session.commit()
         
         return jsonify(transaction.to_dict())
@@ -245,6 +234,7 @@ def delete_transaction(transaction_id):
     """Delete a transaction"""
     try:
         transaction = Transaction.query.get_or_404(transaction_id)
+        StatsCounter.record_transactions([transaction], sign=-1)
         db.session.delete(transaction)
         db.session.commit()
         
@@ -255,6 +245,7 @@ def delete_transaction(transaction_id):
         return jsonify({'error': str(e)}), 500
 
 @transactions_bp.route('/transactions/stats', methods=['GET'])
+@conditional_response(Transaction, Sportsbook, StatsCounter)
 def get_transaction_stats():
     """Get transaction statistics"""
     try:
@@ -263,8 +254,15 @@ def get_transaction_stats():
         end_date = request.args.get('end_date')
         sportsbook = request.args.get('sportsbook')
         
-        # Build base query
-        query = Transaction.query.filter(Transaction.status == 'completed')
+        # One aggregate row per (sportsbook, transaction type) instead of loading every transaction
+        query = db.session.query(
+            Sportsbook.name,
+            Transaction.transaction_type,
+            func.count(Transaction.id),
+            func.coalesce(func.sum(Transaction.amount), 0.0),
+            func.coalesce(func.sum(Transaction.tax), 0.0),
+            func.coalesce(func.sum(Transaction.transaction_charges), 0.0)
+        ).outerjoin(Sportsbook, Transaction.sportsbook_id == Sportsbook.id).filter(Transaction.status == 'completed')
         
         if start_date:
             start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
@@ -275,30 +273,27 @@ def get_transaction_stats():
             query = query.filter(Transaction.date_processed <= end)
         
         if sportsbook:
-            # Filter by sportsbook name through the relationship
-            query = query.join(Sportsbook).filter(Sportsbook.name.ilike(f'%{sportsbook}%'))
-        
-        transactions = query.all()
-        
-        # Calculate statistics
-        total_deposits = sum(t.amount for t in transactions if t.transaction_type == 'deposit')
-        total_withdrawals = sum(t.amount for t in transactions if t.transaction_type == 'withdrawal')
-        
-        # Calculate total tax and charges
-        total_tax = sum(t.tax or 0 for t in transactions)
-        total_charges = sum(t.transaction_charges or 0 for t in transactions)
-        
-        # Net position: withdrawals - deposits - tax - charges (money out perspective)
-        net_position = total_withdrawals - total_deposits - total_tax - total_charges
-        
-        deposit_count = len([t for t in transactions if t.transaction_type == 'deposit'])
-        withdrawal_count = len([t for t in transactions if t.transaction_type == 'withdrawal'])
+            # Filter by sportsbook name
+            query = query.filter(Sportsbook.name.ilike(f'%{sportsbook}%'))
+        
+        if start_date or end_date:
+            rows = query.group_by(Transaction.sportsbook_id, Sportsbook.name, Transaction.transaction_type).all()
+        else:
+            # The running counters have the same totals without touching the transaction table
+            rows = StatsCounter.transaction_rows(sportsbook=sportsbook)
+        
+        total_deposits = 0
+        total_withdrawals = 0
+        total_tax = 0
+        total_charges = 0
+        deposit_count = 0
+        withdrawal_count = 0
+        total_transactions = 0
         
         # Group by sportsbook
         sportsbook_stats = {}
-        for transaction in transactions:
-            # Get sportsbook name from relationship
-            sb = transaction.sportsbook_rel.name if transaction.sportsbook_rel else 'Unknown'
+        for sportsbook_name, transaction_type, count, amount, tax, charges in rows:
+            sb = sportsbook_name or 'Unknown'
             if sb not in sportsbook_stats:
                 sportsbook_stats[sb] = {
                     'deposits': 0,
@@ -308,14 +303,28 @@ def get_transaction_stats():
                     'withdrawal_count': 0
                 }
             
-            if transaction.transaction_type == 'deposit':
-                sportsbook_stats[sb]['deposits'] += transaction.amount
-                sportsbook_stats[sb]['deposit_count'] += 1
+            # Calculate statistics
+            if transaction_type == 'deposit':
+                total_deposits += amount
+                deposit_count += count
+                sportsbook_stats[sb]['deposits'] += amount
+                sportsbook_stats[sb]['deposit_count'] += count
             else:
-                sportsbook_stats[sb]['withdrawals'] += transaction.amount
-                sportsbook_stats[sb]['withdrawal_count'] += 1
+                if transaction_type == 'withdrawal':
+                    total_withdrawals += amount
+                    withdrawal_count += count
+                sportsbook_stats[sb]['withdrawals'] += amount
+                sportsbook_stats[sb]['withdrawal_count'] += count
             
             sportsbook_stats[sb]['net'] = sportsbook_stats[sb]['deposits'] - sportsbook_stats[sb]['withdrawals']
+            
+            # Calculate total tax and charges
+            total_tax += tax
+            total_charges += charges
+            total_transactions += count
+        
+        # Net position: withdrawals - deposits - tax - charges (money out perspective)
+        net_position = total_withdrawals - total_deposits - total_tax - total_charges
         
         return jsonify({
             'total_deposits': round(total_deposits, 2),
@@ -325,7 +334,7 @@ def get_transaction_stats():
             'total_charges': round(total_charges, 2),
             'deposit_count': deposit_count,
             'withdrawal_count': withdrawal_count,
-            'total_transactions': len(transactions),
+            'total_transactions': total_transactions,
             'sportsbook_breakdown': sportsbook_stats
         })
     
@@ -0,0 +1,39 @@
+from app import db
+from sqlalchemy import text
+
+# Free-text columns replaced by the sportsbook_id/account_id foreign keys
+LEGACY_COLUMNS = {
+    'bet': ['sportsbook', 'account'],
+    'transaction': ['sportsbook', 'account']
+}
+
+def get_column_names(table_name):
+    """Column names of a table as the database has it, or [] if the table doesn't exist"""
+    inspector = db.inspect(db.engine)
+    if not inspector.has_table(table_name):
+        return []
+    return [column['name'] for column in inspector.get_columns(table_name)]
+
+def find_legacy_columns():
+    """Legacy columns still present, as a {table_name: [column, ...]} dict"""
+    legacy_columns = {}
+    for table_name, columns in LEGACY_COLUMNS.items():
+        existing = get_column_names(table_name)
+        found = [column for column in columns if column in existing]
+        if found:
+            legacy_columns[table_name] = found
+    return legacy_columns
+
+def drop_legacy_columns():
+    """
+    Drop the legacy columns with ALTER TABLE ... DROP COLUMN, which PostgreSQL and
+    SQLite 3.35+ both support, in one transaction. Returns the dropped (table, column) pairs.
+    """
+    preparer = db.engine.dialect.identifier_preparer
+    dropped = []
+    with db.engine.begin() as conn:
+        for table_name, columns in find_legacy_columns().items():
+            for column in columns:
+                conn.execute(text(f"ALTER TABLE {preparer.quote(table_name)} DROP COLUMN {preparer.quote(column)}"))
+                dropped.append((table_name, column))
+    return dropped
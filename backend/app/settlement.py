@@ -0,0 +1,102 @@
+from app import db
+from app.models.bet import Bet
+from app.models.stats_counter import StatsCounter
+from sqlalchemy import bindparam, case, func, select
+from datetime import datetime
+
+SETTLE_BATCH_SIZE = 500
+
+# How much a bet settled with each status pays out, from its stake and potential
+# payout, and whether an explicit actual_payout may replace it. The rules work on
+# plain numbers and on SQL column expressions alike.
+SETTLEMENT_RULES = {
+    'won': (lambda stake, potential_payout: potential_payout, True),
+    'half_won': (lambda stake, potential_payout: (potential_payout + stake) / 2, True),
+    'lost': (lambda stake, potential_payout: 0, False),
+    'half_lost': (lambda stake, potential_payout: stake / 2, False),  # Half the stake comes back
+    'void': (lambda stake, potential_payout: stake, False)  # Stake returned
+}
+
+SETTLEMENT_STATUSES = list(SETTLEMENT_RULES)
+
+def settlement_payout(status, stake, potential_payout, actual_payout=None):
+    """Actual payout of a bet settled with status"""
+    payout, overridable = SETTLEMENT_RULES[status]
+    if overridable and actual_payout is not None:
+        return actual_payout
+    return payout(stake, potential_payout)
+
+def settle_bet(bet, status, actual_payout=None, now=None):
+    """Settle one bet object in place; profit/loss is always the payout minus the stake"""
+    bet.status = status
+    bet.actual_payout = settlement_payout(status, bet.stake, bet.potential_payout, actual_payout)
+    bet.profit_loss = bet.actual_payout - bet.stake
+    bet.date_settled = now or datetime.now()
+
+def settlement_statement():
+    """
+    UPDATE settling one bet per parameter set (bet_id, new_status, new_actual_payout,
+    settled_at), with the rules as CASE expressions, for executemany over many bets.
+    """
+    table = Bet.__table__
+    new_status = bindparam('new_status')
+    new_actual_payout = bindparam('new_actual_payout', type_=db.Float)
+    
+    whens = {}
+    for status, (payout, overridable) in SETTLEMENT_RULES.items():
+        expression = payout(table.c.stake, table.c.potential_payout)
+        whens[status] = func.coalesce(new_actual_payout, expression) if overridable else expression
+    actual_payout = case(whens, value=new_status, else_=table.c.actual_payout)
+    
+    # SET expressions read the old row, so profit/loss repeats the payout expression
+    return table.update().where(table.c.id == bindparam('bet_id')).values(
+        status=new_status,
+        actual_payout=actual_payout,
+        profit_loss=actual_payout - table.c.stake,
+        date_settled=bindparam('settled_at')
+    )
+
+def _counter_rows(bet_ids):
+    table = Bet.__table__
+    return db.session.execute(select(
+        table.c.id, table.c.account_id, table.c.sportsbook_id, table.c.sport, table.c.status,
+        table.c.stake, table.c.profit_loss, table.c.potential_payout
+    ).where(table.c.id.in_(bet_ids))).all()
+
+def settle_bets(settlements, now=None, batch_size=SETTLE_BATCH_SIZE):
+    """
+    Settle many bets in the caller's transaction. settlements maps bet ids to
+    (status, actual_payout or None). Every batch is one executemany UPDATE; the
+    stats counters are moved from the rows as they were to the rows as they are
+    after it, since the UPDATE bypasses the ORM. Returns the ids of the settled
+    bets; ids of bets that don't exist are left out.
+    """
+    now = now or datetime.now()
+    statement = settlement_statement()
+    bet_ids = list(settlements)
+    settled_ids = []
+    removed = []
+    added = []
+    
+    for start in range(0, len(bet_ids), batch_size):
+        before = _counter_rows(bet_ids[start:start + batch_size])
+        if not before:
+            continue
+        
+        db.session.execute(statement, [
+            {
+                'bet_id': row.id,
+                'new_status': settlements[row.id][0],
+                'new_actual_payout': settlements[row.id][1],
+                'settled_at': now
+            }
+            for row in before
+        ])
+        
+        ids = [row.id for row in before]
+        removed.extend(StatsCounter.bet_entry(row) for row in before)
+        added.extend(StatsCounter.bet_entry(row) for row in _counter_rows(ids))
+        settled_ids.extend(ids)
+    
+    StatsCounter.apply(added=added, removed=removed)
+    return settled_ids
@@ -0,0 +1,89 @@
+"""
+Gunicorn settings for serving the API in production, read from the environment.
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+
+The app is loaded once in the master (preload_app) and forked into WEB_CONCURRENCY
+worker processes of GUNICORN_THREADS threads each. Every open arbitrage stream
+holds a thread for as long as the client is connected, so leave threads to spare.
+The background jobs run in one worker at a time, whichever holds the jobs lock.
+"""
+
+import fcntl
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+
+bind = os.environ.get('GUNICORN_BIND') or f"0.0.0.0:{os.environ.get('PORT', '5001')}"
+workers = int(os.environ.get('WEB_CONCURRENCY') or multiprocessing.cpu_count() * 2 + 1)
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS') or 8)
+preload_app = True
+
+# Streams send a keep-alive every ARBITRAGE_STREAM_HEARTBEAT seconds, well within the timeout
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 60)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT') or 30)
+keepalive = 5
+
+# Recycle workers now and then; the jitter keeps them from restarting together
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS') or 0)
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or '-'
+errorlog = '-'
+
+# One pooled connection per thread is enough; workers * threads must fit the database's connection limit
+os.environ.setdefault('DATABASE_POOL_SIZE', str(threads))
+
+def _app(server):
+    return server.app.wsgi()
+
+def _jobs_lock_path(master_pid):
+    return os.path.join(tempfile.gettempdir(), f'bettracker-jobs-{master_pid}.lock')
+
+def _run_background_jobs(worker):
+    """
+    Wait for the jobs lock, then start the background jobs in this worker. The
+    lock is held until the worker exits, when a waiting worker takes over.
+    """
+    from app.maintenance import start_arbitrage_pruner, start_results_settler
+    lock_file = open(_jobs_lock_path(worker.ppid), 'w')
+    fcntl.flock(lock_file, fcntl.LOCK_EX)
+    worker.jobs_lock_file = lock_file
+    
+    if start_arbitrage_pruner(worker.wsgi):
+        worker.log.info("Started the arbitrage pruner in worker %s", worker.pid)
+    if start_results_settler(worker.wsgi):
+        worker.log.info("Started the results settler in worker %s", worker.pid)
+
+def post_fork(server, worker):
+    """Drop the connections inherited from the master; the worker opens its own"""
+    from app import db
+    with _app(server).app_context():
+        db.engine.dispose(close=False)
+
+def post_worker_init(worker):
+    """
+    Run the background jobs in one worker, where their deletions and settlements
+    reach a broker with subscribers, and end the open arbitrage streams on a
+    graceful shutdown so the worker doesn't wait them out.
+    """
+    threading.Thread(target=_run_background_jobs, args=(worker,), name='jobs-lock', daemon=True).start()
+    
+    from app.events import get_event_broker
+    broker = get_event_broker(worker.wsgi)
+    handle_exit = signal.getsignal(signal.SIGTERM)
+    
+    def close_streams_and_exit(signum, frame):
+        broker.close()
+        handle_exit(signum, frame)
+    
+    signal.signal(signal.SIGTERM, close_streams_and_exit)
+
+def on_exit(server):
+    """Remove the jobs lock file of this master"""
+    try:
+        os.remove(_jobs_lock_path(server.pid))
+    except FileNotFoundError:
+        pass
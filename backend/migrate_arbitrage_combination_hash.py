@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Add the combination_hash column to the arbitrage table, backfill it, remove
+duplicate opportunities and add the (match_signature, combination_hash)
+unique index used by the arbitrage upserts.
+Usage: python migrate_arbitrage_combination_hash.py
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from sqlalchemy import text, func, select, bindparam
+
+BATCH_SIZE = 1000
+
+def ensure_combination_hash_column():
+    """Add the combination_hash column and its index if missing. Returns True if the column was added."""
+    inspector = db.inspect(db.engine)
+    existing_columns = [col['name'] for col in inspector.get_columns('arbitrage')]
+    
+    added = False
+    with db.engine.connect() as conn:
+        if 'combination_hash' not in existing_columns:
+            conn.execute(text("ALTER TABLE arbitrage ADD COLUMN combination_hash VARCHAR(64)"))
+            added = True
+            print("✓ Added combination_hash column to arbitrage table")
+        
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_arbitrage_combination_hash ON arbitrage (combination_hash)"))
+        conn.commit()
+    
+    return added
+
+def backfill_combination_hashes():
+    """Hash every arbitrage that doesn't have a combination hash yet, in batches"""
+    from app.models.arbitrage import Arbitrage
+    
+    table = Arbitrage.__table__
+    update_statement = table.update().where(table.c.id == bindparam('arbitrage_id')).values(
+        combination_hash=bindparam('new_combination_hash')
+    )
+    
+    updated = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            select(table.c.id, table.c.combination_details)
+            .where(table.c.id > last_id, table.c.combination_hash.is_(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        
+        if not batch:
+            break
+        
+        db.session.execute(update_statement, [
+            {
+                'arbitrage_id': arbitrage_id,
+                'new_combination_hash': Arbitrage.compute_combination_hash(
+                    Arbitrage.parse_combination_details(combination_details)
+                )
+            }
+            for arbitrage_id, combination_details in batch
+        ])
+        
+        db.session.commit()
+        updated += len(batch)
+        last_id = batch[-1].id
+    
+    return updated
+
+def has_missing_hashes():
+    """Whether any arbitrage still lacks a combination hash, e.g. one written by an older version"""
+    from app.models.arbitrage import Arbitrage
+    
+    table = Arbitrage.__table__
+    return db.session.execute(select(table.c.id).where(table.c.combination_hash.is_(None)).limit(1)).first() is not None
+
+def remove_duplicate_arbitrages():
+    """Keep only the most recent arbitrage of every (match_signature, combination_hash) pair"""
+    from app.models.arbitrage import Arbitrage
+    
+    table = Arbitrage.__table__
+    latest_ids = select(func.max(table.c.id)).group_by(table.c.match_signature, table.c.combination_hash)
+    
+    removed = db.session.execute(table.delete().where(table.c.id.not_in(latest_ids))).rowcount
+    db.session.commit()
+    return removed
+
+def ensure_unique_index():
+    """Create the unique index that the ON CONFLICT upserts rely on"""
+    with db.engine.connect() as conn:
+        conn.execute(text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS uq_arbitrage_signature_combination "
+            "ON arbitrage (match_signature, combination_hash)"
+        ))
+        conn.commit()
+
+def ensure_not_null():
+    """Add the NOT NULL constraint on PostgreSQL. Returns True if it was added."""
+    inspector = db.inspect(db.engine)
+    column = next(col for col in inspector.get_columns('arbitrage') if col['name'] == 'combination_hash')
+    if not column['nullable']:
+        return False
+    
+    # SQLite can't alter a column; new databases get the constraint from the model
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    
+    with db.engine.connect() as conn:
+        conn.execute(text("ALTER TABLE arbitrage ALTER COLUMN combination_hash SET NOT NULL"))
+        conn.commit()
+    return True
+
+def migrate_arbitrage_combination_hash(app, backfill=True):
+    """Run the migration inside the given app. Backfills when asked or when any hash is missing."""
+    from app.models.arbitrage_group import ArbitrageGroup
+    
+    with app.app_context():
+        try:
+            added = ensure_combination_hash_column()
+            
+            removed = 0
+            if backfill or added or has_missing_hashes():
+                updated = backfill_combination_hashes()
+                print(f"✓ Hashed {updated} arbitrages")
+                
+                removed = remove_duplicate_arbitrages()
+                print(f"✓ Removed {removed} duplicate arbitrages")
+            
+            # The upserts depend on the index, so it comes before the groups, which are derived data
+            ensure_unique_index()
+            if ensure_not_null():
+                print("✓ Made arbitrage.combination_hash NOT NULL")
+            
+            # Groups couldn't be rebuilt by earlier migrations while the column was missing
+            if added or removed:
+                groups = ArbitrageGroup.rebuild()
+                print(f"✓ Rebuilt {groups} arbitrage groups")
+            
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration error: {e}")
+            return False
+
+if __name__ == "__main__":
+    if migrate_arbitrage_combination_hash(create_app()):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Convert arbitrage.kickoff_datetime from free-form ISO strings to the
+DateTime column format, normalized to naive UTC. Rows whose kickoff can't
+be parsed are removed, and the arbitrage groups are rebuilt afterwards.
+Runs before the other arbitrage migrations, which load arbitrages through
+the model and so need readable kickoffs.
+Usage: python migrate_arbitrage_kickoff_datetime.py
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.datetime_utils import parse_datetime
+from sqlalchemy import text, select, bindparam, type_coerce, String
+
+BATCH_SIZE = 1000
+
+# How SQLAlchemy stores DateTime values in SQLite
+SQLITE_DATETIME_GLOB = '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9].[0-9][0-9][0-9][0-9][0-9][0-9]'
+
+def rewrite_kickoffs(condition=None, as_text=False):
+    """
+    Parse the kickoffs (of the rows matching condition, if given) in batches and
+    write them back as naive UTC datetimes, or as text in that form with as_text.
+    Rows whose kickoff can't be parsed are deleted. Returns (converted, removed) counts.
+    """
+    from app.models.arbitrage import Arbitrage
+    
+    table = Arbitrage.__table__
+    raw_kickoff = type_coerce(table.c.kickoff_datetime, String)
+    update_statement = table.update().where(table.c.id == bindparam('arbitrage_id')).values(
+        kickoff_datetime=bindparam('new_kickoff_datetime', type_=String) if as_text else bindparam('new_kickoff_datetime')
+    )
+    
+    converted = 0
+    removed = 0
+    last_id = 0
+    while True:
+        query = select(table.c.id, raw_kickoff).where(table.c.id > last_id)
+        if condition is not None:
+            query = query.where(condition)
+        batch = db.session.execute(query.order_by(table.c.id).limit(BATCH_SIZE)).all()
+        
+        if not batch:
+            break
+        
+        updates = []
+        invalid_ids = []
+        for arbitrage_id, kickoff_datetime in batch:
+            try:
+                kickoff = parse_datetime(kickoff_datetime)
+            except ValueError:
+                invalid_ids.append(arbitrage_id)
+                continue
+            updates.append({
+                'arbitrage_id': arbitrage_id,
+                'new_kickoff_datetime': kickoff.isoformat(sep=' ') if as_text else kickoff
+            })
+        
+        if updates:
+            db.session.execute(update_statement, updates)
+        if invalid_ids:
+            db.session.execute(table.delete().where(table.c.id.in_(invalid_ids)))
+        
+        db.session.commit()
+        converted += len(updates)
+        removed += len(invalid_ids)
+        last_id = batch[-1].id
+    
+    return converted, removed
+
+def convert_postgresql_kickoffs():
+    """
+    Change the column type in place on PostgreSQL, after rewriting the text
+    kickoffs in a form the cast reads (or deleting them). Returns (converted, removed) counts.
+    """
+    inspector = db.inspect(db.engine)
+    column = next(col for col in inspector.get_columns('arbitrage') if col['name'] == 'kickoff_datetime')
+    if not isinstance(column['type'], String):
+        return 0, 0
+    
+    converted, removed = rewrite_kickoffs(as_text=True)
+    
+    with db.engine.connect() as conn:
+        conn.execute(text(
+            "ALTER TABLE arbitrage ALTER COLUMN kickoff_datetime TYPE TIMESTAMP "
+            "USING kickoff_datetime::timestamp"
+        ))
+        # The groups are rebuilt from the arbitrages afterwards
+        conn.execute(text("DELETE FROM arbitrage_group"))
+        conn.execute(text(
+            "ALTER TABLE arbitrage_group ALTER COLUMN kickoff_datetime TYPE TIMESTAMP "
+            "USING kickoff_datetime::timestamp"
+        ))
+        conn.commit()
+    
+    return converted, removed
+
+def convert_sqlite_kickoffs():
+    """Rewrite every kickoff that isn't in the stored DateTime format. Returns (converted, removed) counts."""
+    from app.models.arbitrage import Arbitrage
+    
+    raw_kickoff = type_coerce(Arbitrage.__table__.c.kickoff_datetime, String)
+    return rewrite_kickoffs(raw_kickoff.op('NOT GLOB')(SQLITE_DATETIME_GLOB))
+
+def missing_model_columns():
+    """Arbitrage model columns that pending migrations still have to add to the table"""
+    from app.models.arbitrage import Arbitrage
+    
+    existing = {column['name'] for column in db.inspect(db.engine).get_columns('arbitrage')}
+    return [column.name for column in Arbitrage.__table__.columns if column.name not in existing]
+
+def migrate_arbitrage_kickoff_datetime(app):
+    """Run the migration inside the given app. Safe to run on every start."""
+    from app.models.arbitrage_group import ArbitrageGroup
+    
+    with app.app_context():
+        try:
+            if db.engine.dialect.name == 'postgresql':
+                converted, removed = convert_postgresql_kickoffs()
+            else:
+                converted, removed = convert_sqlite_kickoffs()
+            
+            if converted or removed:
+                print(f"✓ Converted {converted} arbitrage kickoffs to UTC datetimes")
+                if removed:
+                    print(f"✓ Removed {removed} arbitrages with unreadable kickoffs")
+                
+                # The rebuild loads arbitrages through the model, which needs every column
+                missing = missing_model_columns()
+                if missing:
+                    print(f"⚠️ Arbitrage groups are rebuilt once {', '.join(missing)} is added")
+                else:
+                    groups = ArbitrageGroup.rebuild()
+                    print(f"✓ Rebuilt {groups} arbitrage groups")
+            
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration error: {e}")
+            return False
+
+if __name__ == "__main__":
+    if migrate_arbitrage_kickoff_datetime(create_app()):
+        sys.exit(0)
+    else:
+        sys.exit(1)
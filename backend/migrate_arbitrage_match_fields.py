@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Add the market, league, country, home_team and away_team columns to the
+arbitrage table and backfill them from combination_details.
+Usage: python migrate_arbitrage_match_fields.py
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from sqlalchemy import text, select, bindparam
+
+MATCH_FIELD_COLUMNS = {
+    'market': 'VARCHAR(100)',
+    'league': 'VARCHAR(100)',
+    'country': 'VARCHAR(100)',
+    'home_team': 'VARCHAR(100)',
+    'away_team': 'VARCHAR(100)'
+}
+
+INDEXED_COLUMNS = ['market', 'league', 'country']
+
+BATCH_SIZE = 1000
+
+def ensure_match_field_columns():
+    """Add any missing match field columns and their indexes. Returns the list of added columns."""
+    inspector = db.inspect(db.engine)
+    existing_columns = [col['name'] for col in inspector.get_columns('arbitrage')]
+    
+    added_columns = []
+    with db.engine.connect() as conn:
+        for column, column_type in MATCH_FIELD_COLUMNS.items():
+            if column not in existing_columns:
+                conn.execute(text(f"ALTER TABLE arbitrage ADD COLUMN {column} {column_type}"))
+                added_columns.append(column)
+                print(f"✓ Added {column} column to arbitrage table")
+        
+        for column in INDEXED_COLUMNS:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_arbitrage_{column} ON arbitrage ({column})"))
+        
+        conn.commit()
+    
+    return added_columns
+
+def backfill_match_fields():
+    """Extract match fields for every arbitrage that doesn't have them yet, in batches"""
+    from app.models.arbitrage import Arbitrage
+    
+    # Core statements touch only the columns involved, so this works before later migrations ran
+    table = Arbitrage.__table__
+    update_statement = table.update().where(table.c.id == bindparam('arbitrage_id')).values(
+        {column: bindparam(f'new_{column}') for column in MATCH_FIELD_COLUMNS}
+    )
+    
+    updated = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            select(table.c.id, table.c.combination_details)
+            .where(table.c.id > last_id, table.c.market.is_(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        
+        if not batch:
+            break
+        
+        db.session.execute(update_statement, [
+            dict(
+                {f'new_{column}': value for column, value in Arbitrage.match_fields(
+                    Arbitrage.parse_combination_details(combination_details)
+                ).items()},
+                arbitrage_id=arbitrage_id
+            )
+            for arbitrage_id, combination_details in batch
+        ])
+        
+        db.session.commit()
+        updated += len(batch)
+        last_id = batch[-1].id
+    
+    return updated
+
+def migrate_arbitrage_match_fields(app, backfill=True):
+    """Run the migration inside the given app. Backfills when asked or when columns were just added."""
+    with app.app_context():
+        try:
+            added_columns = ensure_match_field_columns()
+            
+            if backfill or added_columns:
+                updated = backfill_match_fields()
+                print(f"✓ Backfilled match fields for {updated} arbitrages")
+            
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration error: {e}")
+            return False
+
+if __name__ == "__main__":
+    if migrate_arbitrage_match_fields(create_app()):
+        sys.exit(0)
+    else:
+        sys.exit(1)
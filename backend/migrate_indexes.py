@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Create any index declared on the models that is missing from the database.
+db.create_all() only creates indexes together with new tables, so databases
+created by an older version need this to pick up new indexes.
+Usage: python migrate_indexes.py
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+
+def ensure_model_indexes():
+    """Create missing model indexes. Returns the names of the indexes created."""
+    inspector = db.inspect(db.engine)
+    
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        existing.update(constraint['name'] for constraint in inspector.get_unique_constraints(table.name))
+        
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            
+            try:
+                index.create(db.engine)
+                created.append(index.name)
+                print(f"✓ Created index {index.name}")
+            except Exception as e:
+                # Usually a column that a pending migration still has to add
+                print(f"⚠️ Could not create index {index.name}: {e}")
+    
+    return created
+
+def migrate_indexes(app):
+    """Run the migration inside the given app"""
+    with app.app_context():
+        try:
+            ensure_model_indexes()
+            return True
+        
+        except Exception as e:
+            print(f"❌ Migration error: {e}")
+            return False
+
+if __name__ == "__main__":
+    if migrate_indexes(create_app()):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Add the case-folded name_key column to the sportsbook table, fill it in and
+index it. Sportsbook names are looked up by name_key instead of lower(name),
+which no index covered.
+Usage: python migrate_sportsbook_name_key.py
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from sqlalchemy import text, select, bindparam
+
+def ensure_name_key_column():
+    """Add the name_key column and its index if missing. Returns True if the column was added."""
+    inspector = db.inspect(db.engine)
+    existing_columns = [col['name'] for col in inspector.get_columns('sportsbook')]
+    
+    added = False
+    with db.engine.connect() as conn:
+        if 'name_key' not in existing_columns:
+            conn.execute(text("ALTER TABLE sportsbook ADD COLUMN name_key VARCHAR(100)"))
+            added = True
+            print("✓ Added name_key column to sportsbook table")
+        
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_sportsbook_name_key ON sportsbook (name_key)"))
+        conn.commit()
+    
+    return added
+
+def backfill_name_keys():
+    """Fold the name of every sportsbook that doesn't have a name_key yet"""
+    from app.models.sportsbook import Sportsbook
+    
+    table = Sportsbook.__table__
+    rows = db.session.execute(select(table.c.id, table.c.name).where(table.c.name_key.is_(None))).all()
+    if rows:
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('sportsbook_id')).values(name_key=bindparam('new_name_key')),
+            [{'sportsbook_id': row.id, 'new_name_key': Sportsbook.fold_name(row.name)} for row in rows]
+        )
+    db.session.commit()
+    return len(rows)
+
+def migrate_sportsbook_name_key(app):
+    """Run the migration inside the given app"""
+    with app.app_context():
+        try:
+            ensure_name_key_column()
+            
+            updated = backfill_name_keys()
+            if updated:
+                print(f"✓ Filled in name_key for {updated} sportsbooks")
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration error: {e}")
+            return False
+
+if __name__ == "__main__":
+    if migrate_sportsbook_name_key(create_app()):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Fill in transactions without a date_created and make the column NOT NULL.
+Transactions are paged on (date_created, id), and a NULL date_created never
+compares true, so those transactions were skipped by every page.
+Usage: python migrate_transaction_date_created.py
+"""
+
+import sys
+import os
+from datetime import datetime
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from sqlalchemy import text, select, func
+
+def backfill_dates_created():
+    """
+    Give every transaction without a date_created its date_processed, or else
+    the earliest date_created of the table, so it sorts with the old ones.
+    Returns the number of transactions filled in.
+    """
+    from app.models.transaction import Transaction
+    
+    table = Transaction.__table__
+    earliest = db.session.execute(select(func.min(table.c.date_created))).scalar() or datetime.now()
+    result = db.session.execute(
+        table.update()
+        .where(table.c.date_created.is_(None))
+        .values(date_created=func.coalesce(table.c.date_processed, earliest))
+    )
+    db.session.commit()
+    return result.rowcount
+
+def ensure_not_null():
+    """Add the NOT NULL constraint on PostgreSQL. Returns True if it was added."""
+    inspector = db.inspect(db.engine)
+    column = next(col for col in inspector.get_columns('transaction') if col['name'] == 'date_created')
+    if not column['nullable']:
+        return False
+    
+    # SQLite can't alter a column; new databases get the constraint from the model
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    
+    with db.engine.connect() as conn:
+        conn.execute(text('ALTER TABLE "transaction" ALTER COLUMN date_created SET NOT NULL'))
+        conn.commit()
+    return True
+
+def migrate_transaction_date_created(app):
+    """Run the migration inside the given app. Safe to run on every start."""
+    with app.app_context():
+        try:
+            updated = backfill_dates_created()
+            if updated:
+                print(f"✓ Filled in date_created for {updated} transactions")
+            
+            if ensure_not_null():
+                print("✓ Made transaction.date_created NOT NULL")
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration error: {e}")
+            return False
+
+if __name__ == "__main__":
+    if migrate_transaction_date_created(create_app(start_background_jobs=False)):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Delete stale arbitrage opportunities: those whose kickoff has passed and,
+with --ttl-hours, those that haven't been refreshed within that many hours.
+Usage: python prune_arbitrages.py [--ttl-hours HOURS] [--batch-size ROWS]
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.maintenance import prune_stale_arbitrages, get_prune_counters
+
+def prune_arbitrages(ttl_hours=None, batch_size=500):
+    """Prune stale arbitrages once"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            if ttl_hours is None:
+                ttl_hours = app.config.get('ARBITRAGE_TTL_HOURS')
+            
+            pruned = prune_stale_arbitrages(ttl_hours=ttl_hours, batch_size=batch_size)
+            counters = get_prune_counters()
+            
+            print(f"✓ Pruned {pruned} stale arbitrages")
+            print(f"  Kickoff passed: {counters['pruned_kickoff_passed']}")
+            print(f"  Not refreshed within TTL: {counters['pruned_ttl_expired']}")
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Pruning error: {e}")
+            return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Prune stale arbitrage opportunities')
+    parser.add_argument('--ttl-hours', type=float, default=None, help='Also delete arbitrages not refreshed within this many hours')
+    parser.add_argument('--batch-size', type=int, default=500, help='Rows deleted per transaction')
+    args = parser.parse_args()
+    
+    if prune_arbitrages(args.ttl_hours, args.batch_size):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Rebuild the arbitrage_group summary table from the arbitrage table.
+Run this once after upgrading, or whenever the summaries look out of sync.
+Usage: python rebuild_arbitrage_groups.py
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models.arbitrage import Arbitrage
+from app.models.arbitrage_group import ArbitrageGroup
+
+def rebuild_arbitrage_groups():
+    """Recompute every arbitrage group summary"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            total_arbitrages = Arbitrage.query.count()
+            print(f"Rebuilding arbitrage groups from {total_arbitrages} arbitrages...")
+            
+            groups_created = ArbitrageGroup.rebuild()
+            
+            print(f"✓ Rebuilt {groups_created} arbitrage groups")
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Rebuild error: {e}")
+            return False
+
+if __name__ == "__main__":
+    if rebuild_arbitrage_groups():
+        sys.exit(0)
+    else:
+        sys.exit(1)
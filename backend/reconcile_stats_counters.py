@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Check the stats_counters table against the bet and transaction tables and
+optionally rebuild it. Run with --rebuild once after upgrading, or whenever
+the check reports differences.
+Usage: python reconcile_stats_counters.py [--rebuild]
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models.bet import Bet
+from app.models.transaction import Transaction
+from app.models.stats_counter import StatsCounter
+
+def ensure_stats_counters(app):
+    """Build the counters of a database that has bets or transactions but no counters yet"""
+    with app.app_context():
+        try:
+            if StatsCounter.query.first() is None and (Bet.query.first() is not None or Transaction.query.first() is not None):
+                rows = StatsCounter.rebuild()
+                print(f"✓ Built {rows} stats counters")
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Stats counter error: {e}")
+            return False
+
+def reconcile_stats_counters(rebuild=False):
+    """Report counters that differ from the raw tables, rebuilding them if asked"""
+    app = create_app()
+    
+    with app.app_context():
+        try:
+            mismatches = StatsCounter.verify()
+            
+            for key, expected, actual in mismatches:
+                kind, account_id, sportsbook_id, category, status = key
+                print(f"  {kind} account={account_id} sportsbook={sportsbook_id} {category}/{status}: "
+                      f"expected {expected['count']} ({expected['amount']:.2f}), "
+                      f"counted {actual['count']} ({actual['amount']:.2f})")
+            
+            if not mismatches:
+                print("✓ Stats counters match the bet and transaction tables")
+            else:
+                print(f"❌ {len(mismatches)} stats counters differ from the bet and transaction tables")
+            
+            if rebuild:
+                rows = StatsCounter.rebuild()
+                print(f"✓ Rebuilt {rows} stats counters")
+                return True
+            
+            return not mismatches
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Reconcile error: {e}")
+            return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Verify or rebuild the stats counters')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute every counter from the raw tables')
+    args = parser.parse_args()
+    
+    if reconcile_stats_counters(args.rebuild):
+        sys.exit(0)
+    else:
+        sys.exit(1)
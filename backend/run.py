@@ -1,113 +1,28 @@
 from app import create_app, db
+from app.schema import find_legacy_columns, drop_legacy_columns
 from init_db import ensure_account_columns
+from startup_migrations import run_startup_migrations
 from sqlalchemy import text
 import os
+import sys
 
-app = create_app()
+# The background jobs are started below, in the process that serves requests
+app = create_app(start_background_jobs=False)
 
 def ensure_clean_schema():
     """Ensure database schema is clean of legacy columns"""
     try:
-        import sqlite3
-        db_path = os.path.join(app.instance_path, 'bet_tracker.db')
-        
-        if not os.path.exists(db_path):
-            return True
-        
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Check if legacy columns exist
-        cursor.execute("PRAGMA table_info(bet)")
-        bet_columns = [col[1] for col in cursor.fetchall()]
-        
-        cursor.execute("PRAGMA table_info(transaction)")
-        transaction_columns = [col[1] for col in cursor.fetchall()]
-        
-        legacy_in_bet = [col for col in ['sportsbook', 'account'] if col in bet_columns]
-        legacy_in_transaction = [col for col in ['sportsbook', 'account'] if col in transaction_columns]
-        
-        if legacy_in_bet or legacy_in_transaction:
-            print("🔧 Cleaning legacy columns from database...")
-            
-            if legacy_in_bet:
-                print("  📝 Fixing bet table...")
-                # Get existing data
-                cursor.execute("SELECT id, sport, event_name, bet_type, selection, sportsbook_id, account_id, odds, stake, status, potential_payout, actual_payout, profit_loss, date_placed, date_settled, kickoff, notes FROM bet")
-                bet_data = cursor.fetchall()
-                
-                # Recreate table
-                cursor.execute("DROP TABLE bet")
-                cursor.execute("""
-                    CREATE TABLE bet (
-                        id INTEGER NOT NULL PRIMARY KEY,
-                        sport VARCHAR(100) NOT NULL,
-                        event_name VARCHAR(200) NOT NULL,
-                        bet_type VARCHAR(100) NOT NULL,
-                        selection VARCHAR(200) NOT NULL,
-                        sportsbook_id INTEGER,
-                        account_id INTEGER,
-                        odds FLOAT NOT NULL,
-                        stake FLOAT NOT NULL,
-                        status VARCHAR(20) NOT NULL DEFAULT 'pending',
-                        potential_payout FLOAT NOT NULL,
-                        actual_payout FLOAT DEFAULT 0.0,
-                        profit_loss FLOAT DEFAULT 0.0,
-                        date_placed DATETIME NOT NULL,
-                        date_settled DATETIME,
-                        kickoff DATETIME,
-                        notes TEXT,
-                        FOREIGN KEY(sportsbook_id) REFERENCES sportsbook (id),
-                        FOREIGN KEY(account_id) REFERENCES accounts (id)
-                    )
-                """)
-                
-                # Restore data
-                for row in bet_data:
-                    cursor.execute("""
-                        INSERT INTO bet VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, row)
-                print("  ✅ Bet table cleaned")
+        with app.app_context():
+            legacy_columns = find_legacy_columns()
             
-            if legacy_in_transaction:
-                print("  📝 Fixing transaction table...")
-                # Get existing data
-                cursor.execute("SELECT id, transaction_type, sportsbook_id, account_id, amount, tax, transaction_charges, payment_method, reference_id, status, date_created, date_processed, notes FROM transaction")
-                transaction_data = cursor.fetchall()
+            if legacy_columns:
+                print("🔧 Cleaning legacy columns from database...")
                 
-                # Recreate table
-                cursor.execute("DROP TABLE transaction")
-                cursor.execute("""
-                    CREATE TABLE transaction (
-                        id INTEGER NOT NULL PRIMARY KEY,
-                        transaction_type VARCHAR(20) NOT NULL,
-                        sportsbook_id INTEGER,
-                        account_id INTEGER,
-                        amount FLOAT NOT NULL,
-                        tax FLOAT NOT NULL DEFAULT 0.0,
-                        transaction_charges FLOAT NOT NULL DEFAULT 0.0,
-                        payment_method VARCHAR(50),
-                        reference_id VARCHAR(100),
-                        status VARCHAR(20) DEFAULT 'completed',
-                        date_created DATETIME,
-                        date_processed DATETIME,
-                        notes TEXT,
-                        FOREIGN KEY(sportsbook_id) REFERENCES sportsbook (id),
-                        FOREIGN KEY(account_id) REFERENCES accounts (id)
-                    )
-                """)
+                for table_name, column in drop_legacy_columns():
+                    print(f"  ✅ Dropped {column} column from {table_name} table")
                 
-                # Restore data
-                for row in transaction_data:
-                    cursor.execute("""
-                        INSERT INTO transaction VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, row)
-                print("  ✅ Transaction table cleaned")
-            
-            conn.commit()
-            print("✅ Database schema cleaned successfully")
+                print("✅ Database schema cleaned successfully")
         
-        conn.close()
         return True
         
     except Exception as e:
@@ -119,8 +34,6 @@ def ensure_foreign_key_columns():
     try:
         with app.app_context():
             with db.engine.connect() as conn:
-                conn.execute(text("PRAGMA foreign_keys = ON"))
-                
                 # Check and add sportsbook_id and account_id columns if they don't exist
                 inspector = db.inspect(db.engine)
                 
@@ -134,9 +47,9 @@ def ensure_foreign_key_columns():
                 # Check transaction table
                 transaction_columns = [col['name'] for col in inspector.get_columns('transaction')]
                 if 'sportsbook_id' not in transaction_columns:
-                    conn.execute(text("ALTER TABLE transaction ADD COLUMN sportsbook_id INTEGER"))
+                    conn.execute(text('ALTER TABLE "transaction" ADD COLUMN sportsbook_id INTEGER'))
                 if 'account_id' not in transaction_columns:
-                    conn.execute(text("ALTER TABLE transaction ADD COLUMN account_id INTEGER"))
+                    conn.execute(text('ALTER TABLE "transaction" ADD COLUMN account_id INTEGER'))
                 
                 conn.commit()
             
@@ -382,5 +295,17 @@ if __name__ == '__main__':
     # from app.models.sportsbook import Sportsbook
     # populate_sample_data()
     
+    if not run_startup_migrations(app):
+        print("❌ Startup migrations failed, not starting the server")
+        sys.exit(1)
+    
+    # The reloader runs the server in a child process (WERKZEUG_RUN_MAIN set);
+    # the watching parent doesn't serve, so it doesn't run the jobs either
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        from app.maintenance import start_arbitrage_pruner, start_results_settler
+        start_arbitrage_pruner(app)
+        start_results_settler(app)
+    
+    # Development server; use gunicorn -c gunicorn.conf.py wsgi:app in production
     print("Starting server...")
     app.run(debug=True, host='0.0.0.0', port=5001)
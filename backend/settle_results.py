@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Settle pending bets from a results feed: a JSON or NDJSON file, or an http(s)
+URL, of {event_name, market, outcome} results (see app/results_feed.py).
+Bets matching a result's event and market win or lose by their selection.
+Usage: python settle_results.py [--source PATH_OR_URL] [--batch-size RESULTS]
+"""
+
+import argparse
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.maintenance import settle_from_results
+from app.results_feed import load_results
+
+def settle_results_feed(source=None, batch_size=500):
+    """Settle bets from the results feed once"""
+    app = create_app(start_background_jobs=False)
+    
+    with app.app_context():
+        try:
+            source = source or app.config.get('RESULTS_FEED')
+            if not source:
+                print("❌ Pass --source or set RESULTS_FEED to the results file or URL")
+                return False
+            
+            summary = settle_from_results(load_results(source), batch_size=batch_size)
+            
+            print(f"✓ Settled {summary['settled']} bets from {summary['results']} results")
+            print(f"  Results without pending bets: {summary['unmatched_results']}")
+            for error in summary['errors']:
+                print(f"⚠️ Result {error['index']}: {error['error']}")
+            return True
+        
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Settlement error: {e}")
+            return False
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Settle pending bets from a results feed')
+    parser.add_argument('--source', default=None, help='Results file or http(s) URL (default: RESULTS_FEED)')
+    parser.add_argument('--batch-size', type=int, default=500, help='Results settled per transaction')
+    args = parser.parse_args()
+    
+    if settle_results_feed(args.source, args.batch_size):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Bring a database created by an older version up to date: the migrations that
+run.py runs before starting the development server. The production entry point
+(wsgi.py) runs them once in the gunicorn master, and they can also be run on
+their own before a deploy.
+Usage: python startup_migrations.py
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from migrate_arbitrage_match_fields import migrate_arbitrage_match_fields
+from migrate_arbitrage_combination_hash import migrate_arbitrage_combination_hash
+from migrate_arbitrage_kickoff_datetime import migrate_arbitrage_kickoff_datetime
+from migrate_indexes import migrate_indexes
+from migrate_sportsbook_name_key import migrate_sportsbook_name_key
+from migrate_transaction_date_created import migrate_transaction_date_created
+from reconcile_stats_counters import ensure_stats_counters
+
+def run_startup_migrations(app):
+    """Run every startup migration against app's database. Returns True if all succeeded."""
+    results = [
+        migrate_arbitrage_match_fields(app, backfill=False),
+        # Kickoffs first: the other arbitrage migrations read arbitrages through the model
+        migrate_arbitrage_kickoff_datetime(app),
+        migrate_arbitrage_combination_hash(app, backfill=False),
+        migrate_sportsbook_name_key(app),
+        migrate_transaction_date_created(app),
+        migrate_indexes(app),
+        ensure_stats_counters(app)
+    ]
+    return all(results)
+
+if __name__ == "__main__":
+    if run_startup_migrations(create_app(start_background_jobs=False)):
+        sys.exit(0)
+    else:
+        sys.exit(1)
@@ -0,0 +1,21 @@
+"""
+WSGI entry point for production servers. The background jobs are left to the
+server configuration, so that several worker processes don't each run them.
+Usage: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from startup_migrations import run_startup_migrations
+
+app = create_app(start_background_jobs=False)
+
+# With preload_app this runs once, in the master, before any worker starts;
+# failing here stops gunicorn instead of serving a half-migrated database
+if not run_startup_migrations(app):
+    raise RuntimeError("Startup migrations failed, see the errors above")
@@ -14,6 +14,12 @@ import {
 import { betService } from '../services/api.js';
 import { accountService } from '../services/accountApi.js';
 
+// Kickoffs come from the API in UTC; datetime-local inputs hold local time without an offset
+const toLocalInputValue = (isoString) => {
+  const date = new Date(isoString);
+  return new Date(date.getTime() - date.getTimezoneOffset() * 60000).toISOString().slice(0, 16);
+};
+
 const BetForm = ({ open, onClose, onSubmit, bet = null }) => {
   const [formData, setFormData] = useState({
     sport: '',
@@ -67,7 +73,7 @@ const BetForm = ({ open, onClose, onSubmit, bet = null }) => {
         account: bet.account || '',
         odds: bet.odds || '',
         stake: bet.stake || '',
-        kickoff: bet.kickoff ? bet.kickoff.slice(0, 16) : '', // Format for datetime-local input
+        kickoff: bet.kickoff ? toLocalInputValue(bet.kickoff) : '', // Format for datetime-local input
         notes: bet.notes || '',
       });
     } else {
@@ -134,6 +140,7 @@ const BetForm = ({ open, onClose, onSubmit, bet = null }) => {
         ...formData,
         odds: parseFloat(formData.odds),
         stake: parseFloat(formData.stake),
+        kickoff: formData.kickoff ? new Date(formData.kickoff).toISOString() : formData.kickoff,
       };
 
       if (bet) {
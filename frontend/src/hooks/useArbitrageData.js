@@ -1,4 +1,4 @@
-import { useState, useEffect, useCallback } from 'react';
+import { useState, useEffect, useCallback, useRef } from 'react';
 import { arbitrageService } from '../services/arbitrageApi.js';
 import { getStoredMatchesPerPage, setStoredMatchesPerPage } from '../utils/localStorage.js';
 
@@ -18,6 +18,8 @@ export const useArbitrageData = () => {
     hasPrevPage: false,
     totalOpportunities: 0 // This will be total individual opportunities
   });
+  const paginationRef = useRef(pagination);
+  paginationRef.current = pagination;
   const [stats, setStats] = useState({
     totalOpportunities: 0,
     bestProfit: 0,
@@ -317,13 +319,34 @@ export const useArbitrageData = () => {
     const storedLimit = getStoredMatchesPerPage(10);
     fetchData(1, storedLimit);
 
-    // Set up interval to fetch every hour (3600000ms)
-    const interval = setInterval(() => {
-      fetchData(pagination.currentPage, pagination.itemsPerPage);
-    }, 3600000);
+    // Refetch when the server pushes arbitrage changes instead of polling
+    let refreshTimer = null;
+    const unsubscribe = arbitrageService.subscribeToChanges((event, payload) => {
+      if (event === 'groups') {
+        // Drop the cached details of the matches that changed
+        const changed = [...payload.updated.map(group => group.match_signature), ...payload.removed];
+        setMatchDetails(prev => {
+          const next = { ...prev };
+          changed.forEach(matchSignature => delete next[matchSignature]);
+          return next;
+        });
+      } else if (event !== 'resync') {
+        // Every change is followed by a groups event
+        return;
+      }
+
+      // Coalesce bursts of changes into one refetch of the current page
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => {
+        fetchData(paginationRef.current.currentPage, paginationRef.current.itemsPerPage);
+      }, 1000);
+    });
 
-    // Cleanup interval on component unmount
-    return () => clearInterval(interval);
+    // Close the stream on component unmount
+    return () => {
+      clearTimeout(refreshTimer);
+      unsubscribe();
+    };
   }, [fetchData]);
 
   return { 
@@ -92,6 +92,15 @@ export const arbitrageService = {
     return response.data;
   },
 
+  // Subscribe to arbitrage changes pushed by the server. Returns a function that closes the stream.
+  subscribeToChanges: (onEvent) => {
+    const source = new EventSource(`${API_BASE_URL}/arbitrages/stream`);
+    ['inserted', 'updated', 'deleted', 'groups', 'resync'].forEach(event => {
+      source.addEventListener(event, (message) => onEvent(event, JSON.parse(message.data)));
+    });
+    return () => source.close();
+  },
+
   // Add arbitrage opportunity to bets
   addArbitrageToBets: async (arbitrageId, options = {}) => {
     const response = await axios.post(`${API_BASE_URL}/arbitrages/${arbitrageId}/add-to-bets`, options);
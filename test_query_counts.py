@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Regression test for N+1 queries: every listing must issue the same number
+of SQL statements whether it returns a few rows or a full page.
+"""
+
+import sys
+import os
+
+# Add the backend directory to Python path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from app import create_app, db
+from app.models.bet import Bet
+from app.models.transaction import Transaction
+from app.models.sportsbook import Sportsbook
+from app.models.account import Account
+from app.models.arbitrage import Arbitrage
+from app.resolvers import get_name_cache
+from sqlalchemy import event
+
+LISTINGS = [
+    '/api/bets?per_page=100',
+    '/api/bets?per_page=100&cursor=',
+    '/api/bets/filters',
+    '/api/transactions?per_page=100',
+    '/api/transactions?per_page=100&cursor=',
+    '/api/transactions/stats'
+]
+
+def create_test_app():
+    """App on a private in-memory database"""
+    return create_app({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'ARBITRAGE_PRUNE_INTERVAL': 0
+    })
+
+def add_rows(count):
+    """Add count bets and transactions, each with its own sportsbook and account"""
+    for i in range(count):
+        sportsbook = Sportsbook(name=f'Sportsbook {Sportsbook.query.count()}')
+        account = Account(
+            account_identifier=f'user{Account.query.count()}@example.com',
+            account_type='email',
+            name=f'User {Account.query.count()}'
+        )
+        db.session.add_all([sportsbook, account])
+        db.session.flush()
+        
+        db.session.add(Bet(
+            sport='Soccer', event_name='A vs B', bet_type='Moneyline', selection='A',
+            sportsbook_id=sportsbook.id, account_id=account.id,
+            odds=2.0, stake=10.0, potential_payout=20.0
+        ))
+        db.session.add(Transaction(
+            transaction_type='deposit' if i % 2 else 'withdrawal',
+            sportsbook_id=sportsbook.id, account_id=account.id, amount=100.0
+        ))
+    db.session.commit()
+
+def count_statements(client, url, json=None, kind=None):
+    """Number of SQL statements (only kind ones, e.g. 'SELECT', if given) executed while serving url (a POST of json if given)"""
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if kind is None or statement.lstrip().upper().startswith(kind):
+            statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        response = client.post(url, json=json) if json is not None else client.get(url)
+        assert response.status_code in (200, 201), response.get_json()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    
+    return len(statements)
+
+def test_listing_query_counts():
+    """Listings don't issue extra statements per row"""
+    app = create_test_app()
+    client = app.test_client()
+    
+    with app.app_context():
+        add_rows(3)
+        small = {url: count_statements(client, url) for url in LISTINGS}
+        
+        add_rows(47)
+        large = {url: count_statements(client, url) for url in LISTINGS}
+        
+        for url in LISTINGS:
+            print(f"{url}: {small[url]} statements for 3 rows, {large[url]} for 50 rows")
+            assert small[url] == large[url], f"{url} issues extra statements per row"
+            assert large[url] <= 3, f"{url} issues {large[url]} statements"
+
+def arbitrage_legs(count, first_sportsbook=0):
+    """add-to-bets payload with count legs, each on its own sportsbook and account"""
+    return {
+        'match_signature': 'A vs B',
+        'profit': 2.0,
+        'combination_details': [
+            {'bookmaker': f'Book {first_sportsbook + i}', 'odds': 2.0, 'name': f'Leg {i}'} for i in range(count)
+        ],
+        'stakes': [{'stake': 10.0, 'account': f'user{i}@example.com'} for i in range(count)]
+    }
+
+def test_arbitrage_to_bets_query_counts():
+    """
+    Sportsbooks and accounts of every leg are looked up together, not leg by leg.
+    Only reads are counted: SQLite runs one INSERT ... RETURNING per new row.
+    """
+    app = create_test_app()
+    client = app.test_client()
+    
+    with app.app_context():
+        add_rows(10)
+        
+        # Legs on new sportsbooks, which are created, then on existing ones
+        new_small = count_statements(client, '/api/arbitrages/add-to-bets', arbitrage_legs(2, 100), 'SELECT')
+        new_large = count_statements(client, '/api/arbitrages/add-to-bets', arbitrage_legs(10, 200), 'SELECT')
+        small = count_statements(client, '/api/arbitrages/add-to-bets', arbitrage_legs(2, 100), 'SELECT')
+        large = count_statements(client, '/api/arbitrages/add-to-bets', arbitrage_legs(10, 200), 'SELECT')
+        
+        print(f"add-to-bets: {small} reads for 2 legs, {large} for 10 legs ({new_small}/{new_large} with new sportsbooks)")
+        assert new_small == new_large, "add-to-bets issues extra reads per new sportsbook"
+        assert small == large, "add-to-bets issues extra reads per leg"
+
+def test_arbitrage_batch_to_bets_query_counts():
+    """A batch of arbitrages costs the same reads however many arbitrages it holds"""
+    app = create_test_app()
+    client = app.test_client()
+    
+    with app.app_context():
+        add_rows(10)
+        for i in range(10):
+            client.post('/api/arbitrages', json={
+                'match_signature': f'Match {i}', 'profit': 1.0, 'kickoff_datetime': '2030-01-01T12:00:00Z',
+                'combination_details': arbitrage_legs(3)['combination_details']
+            })
+        
+        def batch(count):
+            # Stored arbitrages by id next to arbitrage data
+            stored_ids = [arbitrage.id for arbitrage in Arbitrage.query.limit(count)]
+            return {'arbitrages': stored_ids + [arbitrage_legs(3) for _ in range(count)], 'stake': 5.0}
+        
+        count_statements(client, '/api/arbitrages/add-to-bets/batch', batch(1))
+        
+        # Without cached names, so that every sportsbook and account is looked up
+        get_name_cache(app).clear()
+        small = count_statements(client, '/api/arbitrages/add-to-bets/batch', batch(2), 'SELECT')
+        get_name_cache(app).clear()
+        large = count_statements(client, '/api/arbitrages/add-to-bets/batch', batch(10), 'SELECT')
+        
+        print(f"add-to-bets batch: {small} reads for 2+2 arbitrages, {large} for 10+10")
+        assert small == large, "add-to-bets batch issues extra reads per arbitrage"
+
+if __name__ == "__main__":
+    test_listing_query_counts()
+    test_arbitrage_to_bets_query_counts()
+    test_arbitrage_batch_to_bets_query_counts()
+    print("\n✅ Query count test passed!")